@@ -0,0 +1,35 @@
+"""Replace usage_counters period index with a (tenant, period, agent) lookup index
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "009"
+down_revision: Union[str, None] = "008"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # The new index's (tenant_id, period_start) prefix serves the old index's queries
+    op.create_index(
+        "idx_usage_counters_tenant_period_agent",
+        "usage_counters",
+        ["tenant_id", "period_start", "agent"],
+    )
+    op.drop_index("idx_usage_counters_tenant_period", table_name="usage_counters")
+
+
+def downgrade() -> None:
+    op.create_index(
+        "idx_usage_counters_tenant_period",
+        "usage_counters",
+        ["tenant_id", "period_start"],
+    )
+    op.drop_index("idx_usage_counters_tenant_period_agent", table_name="usage_counters")
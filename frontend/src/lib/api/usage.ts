@@ -39,6 +39,7 @@ export interface UsageStatsResponse {
   };
   total_overage_cost_cents: number;
   alerts: UsageAlert[];
+  alerts_by_agent: Record<string, UsageAlert>;
 }
 
 /**
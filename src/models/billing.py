@@ -1,6 +1,6 @@
 """Billing models for subscriptions, plans, and invoices."""
 from datetime import datetime
-from typing import Optional
+from typing import Any, NamedTuple, Optional, cast
 import uuid
 
 from sqlalchemy import Column, String, Integer, Boolean, DateTime, ForeignKey, Text
@@ -10,6 +10,14 @@ from sqlalchemy.orm import relationship
 from src.core.database import Base
 
 
+class PlanLimits(NamedTuple):
+    """Monthly usage limits parsed from Plan.limits (0 means no limit)."""
+
+    emails_per_month: int
+    invoices_per_month: int
+    meetings_per_month: int
+
+
 class Plan(Base):
     """Plan model - synced from Stripe Products/Prices."""
 
@@ -30,6 +38,20 @@ class Plan(Base):
     def __repr__(self) -> str:
         return f"<Plan {self.name} (${self.price_cents/100}/month)>"
 
+    @property
+    def parsed_limits(self) -> PlanLimits:
+        """Limits JSONB coerced to ints.
+
+        Parsed on every access so it always reflects the loaded row, even
+        after limits is reassigned or the instance is refreshed.
+        """
+        limits = cast(dict[str, Any], self.limits or {})
+        return PlanLimits(
+            emails_per_month=int(limits.get("emails_per_month") or 0),
+            invoices_per_month=int(limits.get("invoices_per_month") or 0),
+            meetings_per_month=int(limits.get("meetings_per_month") or 0),
+        )
+
 
 class Subscription(Base):
     """Subscription model - one per tenant."""
@@ -72,7 +72,8 @@ class UsageCounter(Base):
     __table_args__ = (
         UniqueConstraint('tenant_id', 'agent', 'period_start', name='uq_usage_counter_tenant_agent_period'),
         CheckConstraint('count >= 0', name='ck_usage_counter_count_non_negative'),
-        Index('idx_usage_counters_tenant_period', 'tenant_id', 'period_start'),
+        # Covers both the per-period lookup and the per-agent lookup within a period
+        Index('idx_usage_counters_tenant_period_agent', 'tenant_id', 'period_start', 'agent'),
     )
 
     def __repr__(self) -> str:
@@ -73,6 +73,9 @@ class UsageStatsResponse(BaseModel):
     usage: Dict[str, AgentUsage] = Field(..., description="Usage by agent type")
     total_overage_cost_cents: int = Field(..., ge=0, description="Total overage cost in cents")
     alerts: List[UsageAlert] = Field(default_factory=list, description="Usage alerts")
+    alerts_by_agent: Dict[str, UsageAlert] = Field(
+        default_factory=dict, description="Usage alerts keyed by agent type"
+    )
 
     class Config:
         json_schema_extra = {
@@ -124,5 +127,17 @@ class UsageStatsResponse(BaseModel):
                         "level": "error",
                     },
                 ],
+                "alerts_by_agent": {
+                    "inbox": {
+                        "agent": "inbox",
+                        "message": "You've used 85% of your email quota this month",
+                        "level": "warning",
+                    },
+                    "invoice": {
+                        "agent": "invoice",
+                        "message": "You've exceeded your invoice quota. Extra charges: $0.20",
+                        "level": "error",
+                    },
+                },
             }
         }
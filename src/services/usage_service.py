@@ -38,6 +38,14 @@ class UsageService:
         "meeting": "meetings_per_month",
     }
 
+    # Alert thresholds (usage percentage)
+    WARNING_THRESHOLD = 80
+    ERROR_THRESHOLD = 100
+
+    # Alert message templates
+    ERROR_ALERT_TEMPLATE = "You've exceeded your {agent} quota. Extra charges: ${dollars}.{cents:02d}"
+    WARNING_ALERT_TEMPLATE = "You've used {percentage}% of your {agent} quota this month"
+
     def __init__(self, db: Session):
         self.db = db
 
@@ -131,6 +139,7 @@ class UsageService:
             usage=usage_data,
             total_overage_cost_cents=total_overage_cost,
             alerts=alerts,
+            alerts_by_agent={alert.agent: alert for alert in alerts},
         )
 
     def _get_active_subscription(self, tenant_id: UUID) -> Subscription:
@@ -179,7 +188,7 @@ class UsageService:
 
     def _get_agent_limit(self, plan: Plan, agent: str) -> int:
         """
-        Extract usage limit for an agent from plan.limits JSONB.
+        Extract usage limit for an agent from the plan's parsed limits.
 
         Args:
             plan: Plan object
@@ -196,10 +205,10 @@ class UsageService:
             )
             return 0
 
-        limit = plan.limits.get(limit_key, 0)
+        limit = getattr(plan.parsed_limits, limit_key)
 
         # Handle trial users with generous limits or no limits
-        if limit == 0 or limit is None:
+        if limit == 0:
             logger.debug(
                 "Plan has no limit for agent (trial or unlimited)",
                 extra={"plan_id": plan.id, "agent": agent},
@@ -236,21 +245,26 @@ class UsageService:
         alerts = []
 
         for agent, usage in usage_data.items():
-            if usage.percentage >= 100:
-                # Overage alert (error level)
+            if usage.percentage >= self.ERROR_THRESHOLD:
+                # Overage alert (error level); integer cents avoid float rounding
+                dollars, cents = divmod(usage.overage_cost_cents, 100)
                 alerts.append(
                     UsageAlert(
                         agent=agent,
-                        message=f"You've exceeded your {agent} quota. Extra charges: ${usage.overage_cost_cents / 100:.2f}",
+                        message=self.ERROR_ALERT_TEMPLATE.format(
+                            agent=agent, dollars=dollars, cents=cents
+                        ),
                         level="error",
                     )
                 )
-            elif usage.percentage >= 80:
+            elif usage.percentage >= self.WARNING_THRESHOLD:
                 # High usage warning
                 alerts.append(
                     UsageAlert(
                         agent=agent,
-                        message=f"You've used {usage.percentage}% of your {agent} quota this month",
+                        message=self.WARNING_ALERT_TEMPLATE.format(
+                            agent=agent, percentage=usage.percentage
+                        ),
                         level="warning",
                     )
                 )
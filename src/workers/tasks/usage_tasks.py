@@ -330,7 +330,7 @@ def reconcile_usage_counters() -> Dict[str, int]:
 
 def _get_limit_for_agent(plan: Plan, agent: str) -> int:
     """
-    Helper function to extract limit for agent from plan.limits JSONB.
+    Helper function to extract limit for agent from plan.parsed_limits.
 
     Args:
         plan: Plan object
@@ -349,4 +349,4 @@ def _get_limit_for_agent(plan: Plan, agent: str) -> int:
     if not limit_key:
         return 0
 
-    return plan.limits.get(limit_key, 0)
+    return getattr(plan.parsed_limits, limit_key)
@@ -1,17 +1,22 @@
 """Pytest configuration and fixtures."""
 
+import itertools
 import os
 from datetime import datetime, timedelta
 from typing import Generator
 from unittest.mock import MagicMock, patch
-from uuid import uuid4, UUID
+from uuid import NAMESPACE_URL, UUID, uuid4, uuid5
 
 import pytest
 from cryptography.fernet import Fernet
 from cryptography.hazmat.primitives import serialization
-from cryptography.hazmat.primitives.asymmetric import rsa
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from cryptography.hazmat.primitives.asymmetric import ec, rsa
+from sqlalchemy import Column, MetaData, Table, create_engine, event
+from sqlalchemy.dialects.postgresql import ARRAY, INET, JSONB
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
 
 
 # =============================================================================
@@ -39,6 +44,24 @@ def generate_rsa_keys() -> tuple[str, str]:
     return private_pem, public_pem
 
 
+def generate_ec_keys() -> tuple[str, str]:
+    """Generate ECDSA P-256 key pair for testing (ES256)."""
+    private_key = ec.generate_private_key(ec.SECP256R1())
+
+    private_pem = private_key.private_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PrivateFormat.PKCS8,
+        encryption_algorithm=serialization.NoEncryption(),
+    ).decode("utf-8")
+
+    public_pem = private_key.public_key().public_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PublicFormat.SubjectPublicKeyInfo,
+    ).decode("utf-8")
+
+    return private_pem, public_pem
+
+
 # Generate test RSA keys
 TEST_PRIVATE_KEY, TEST_PUBLIC_KEY = generate_rsa_keys()
 
@@ -66,18 +89,38 @@ TEST_DATABASE_URL = "sqlite:///:memory:"
 # Auth Fixtures (FEAT-001)
 # =============================================================================
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def encryption_key() -> str:
-    """Generate a fresh encryption key for tests."""
+    """Generate an encryption key shared by the test session."""
     return Fernet.generate_key().decode()
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
+def encryption_service(encryption_key: str):
+    """TokenEncryptionService shared by the test session."""
+    from src.services.token_encryption import TokenEncryptionService
+
+    return TokenEncryptionService(encryption_key)
+
+
+@pytest.fixture(scope="session")
 def rsa_keys() -> tuple[str, str]:
-    """Generate fresh RSA key pair for tests."""
+    """Generate an RSA key pair shared by all tests in the session."""
+    return generate_rsa_keys()
+
+
+@pytest.fixture(scope="session")
+def rsa_keys_alt() -> tuple[str, str]:
+    """Generate a second RSA key pair, distinct from rsa_keys."""
     return generate_rsa_keys()
 
 
+@pytest.fixture(scope="session")
+def ec_keys() -> tuple[str, str]:
+    """Generate an ECDSA P-256 key pair shared by all tests in the session."""
+    return generate_ec_keys()
+
+
 @pytest.fixture
 def mock_redis() -> Generator[MagicMock, None, None]:
     """Create a mock Redis client."""
@@ -93,20 +136,139 @@ def mock_redis() -> Generator[MagicMock, None, None]:
 # Database Fixtures
 # =============================================================================
 
+# Render the PostgreSQL-only column types on the SQLite test database
+@compiles(JSONB, "sqlite")
+@compiles(ARRAY, "sqlite")
+def _compile_json_sqlite(type_, compiler, **kw):
+    return "JSON"
+
+
+@compiles(INET, "sqlite")
+def _compile_inet_sqlite(type_, compiler, **kw):
+    return "VARCHAR(45)"
+
+
+def _stub_missing_fk_targets(metadata: MetaData) -> None:
+    """Add id-only tables for foreign-key targets the metadata does not define.
+
+    The models reference tables that live on the other declarative Base
+    (users) or have no model at all (tenants). SQLite does not enforce
+    foreign keys, so an id column is enough for the DDL to compile.
+    """
+    for table in list(metadata.tables.values()):
+        for fk in table.foreign_keys:
+            target = fk.target_fullname.split(".")[0]
+            if target not in metadata.tables:
+                Table(target, metadata, Column("id", PG_UUID(as_uuid=True), primary_key=True))
+
+
+@pytest.fixture(scope="session")
+def db_engine():
+    """Create the test database engine and schema once per test session.
+
+    Models are split across two declarative bases (src.models.base and
+    src.core.database), so both metadatas are created. The src.models.base
+    tables go first so a real table always wins over an id-only stub of
+    the same name.
+
+    Under pytest-xdist each worker process gets its own session, and so its
+    own in-memory database.
+    """
+    import src.models  # noqa: F401  (registers every model on its Base)
+    from src.core.database import Base as CoreBase
+    from src.models.base import Base as ModelBase
+
+    metadatas = (ModelBase.metadata, CoreBase.metadata)
+    for metadata in metadatas:
+        _stub_missing_fk_targets(metadata)
+
+    # StaticPool keeps the single in-memory database alive for the whole session
+    engine = create_engine(
+        TEST_DATABASE_URL,
+        echo=False,
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+
+    # pysqlite defers BEGIN on its own, which breaks SAVEPOINT handling;
+    # take over transaction control so the per-test rollback really rolls back.
+    @event.listens_for(engine, "connect")
+    def _disable_pysqlite_begin(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def _emit_begin(connection):
+        connection.exec_driver_sql("BEGIN")
+
+    for metadata in metadatas:
+        metadata.create_all(engine)
+    try:
+        yield engine
+    finally:
+        for metadata in reversed(metadatas):
+            metadata.drop_all(engine)
+        engine.dispose()
+
+
 @pytest.fixture(scope="function")
-def db_session():
-    """Create a test database session."""
-    from src.core.database import Base
-
-    engine = create_engine(TEST_DATABASE_URL, echo=False)
-    Base.metadata.create_all(engine)
-    TestingSessionLocal = sessionmaker(bind=engine)
-    session = TestingSessionLocal()
+def db_session(db_engine):
+    """Create a test database session rolled back at teardown.
+
+    The session joins an outer transaction on a dedicated connection;
+    session.commit() only releases a SAVEPOINT, so nothing a test writes
+    survives into the next test.
+    """
+    connection = db_engine.connect()
+    transaction = connection.begin()
+    session = Session(bind=connection, join_transaction_mode="create_savepoint")
     try:
         yield session
     finally:
         session.close()
-        Base.metadata.drop_all(engine)
+        transaction.rollback()
+        connection.close()
+
+
+@pytest.fixture(scope="module")
+def db_session_module(db_engine):
+    """Create a database session shared by every test in a module.
+
+    Used for module-scoped seed data. Like db_session it joins an outer
+    transaction that is rolled back when the module finishes; tests then
+    take db_session_nested for their own writes.
+    """
+    connection = db_engine.connect()
+    transaction = connection.begin()
+    session = Session(bind=connection, join_transaction_mode="create_savepoint")
+    try:
+        yield session
+    finally:
+        session.close()
+        transaction.rollback()
+        connection.close()
+
+
+@pytest.fixture
+def db_session_nested(db_session_module):
+    """Run a test in a SAVEPOINT on the module session.
+
+    Everything the test writes, including commits and changes to the
+    module-scoped seed rows, is rolled back afterwards and the seed
+    objects are reloaded on next access.
+
+    Any session SAVEPOINT left open by seeding (e.g. an attribute reload
+    after a fixture's commit) is released first; otherwise a commit in the
+    test would release it and take the per-test SAVEPOINT with it.
+    """
+    if db_session_module.in_transaction():
+        db_session_module.commit()
+    savepoint = db_session_module.bind.begin_nested()
+    try:
+        yield db_session_module
+    finally:
+        db_session_module.rollback()
+        savepoint.rollback()
+        db_session_module.expire_all()
 
 
 @pytest.fixture
@@ -133,14 +295,89 @@ def user_id():
     return uuid4()
 
 
+@pytest.fixture
+def make_uuid(worker_id, request):
+    """Factory for UUIDs that are reproducible per test and unique per xdist worker."""
+    sequence = itertools.count()
+
+    def _make() -> UUID:
+        return uuid5(NAMESPACE_URL, f"{worker_id}:{request.node.nodeid}:{next(sequence)}")
+
+    return _make
+
+
+@pytest.fixture(scope="session")
+def orphan_tenant_id():
+    """Tenant ID that never has a subscription, shared by negative-path tests."""
+    return uuid4()
+
+
 # =============================================================================
 # Slack Fixtures (FEAT-006)
 # =============================================================================
 
+@pytest.fixture(scope="module")
+def _slack_web_client():
+    """WebClient class as seen by SlackService, patched for the rest of the module."""
+    with patch("src.services.slack_service.WebClient") as mock:
+        yield mock
+
+
 @pytest.fixture
-def mock_slack_client():
-    """Mock Slack WebClient."""
-    with patch("slack_sdk.WebClient") as mock:
-        client = MagicMock()
-        mock.return_value = client
-        yield client
+def mock_slack_client(_slack_web_client):
+    """Mock Slack WebClient instance, reset after each test."""
+    yield _slack_web_client.return_value
+    _slack_web_client.reset_mock(return_value=True, side_effect=True)
+
+
+@pytest.fixture(scope="module")
+def sample_workflow_id():
+    """Sample workflow ID for notification payloads."""
+    return UUID("87654321-4321-8765-4321-876543218765")
+
+
+@pytest.fixture(scope="module")
+def sample_email_payload(sample_workflow_id):
+    """Email notification payload."""
+    from src.schemas.slack import EmailNotificationPayload
+
+    return EmailNotificationPayload(
+        workflow_id=sample_workflow_id,
+        sender="client@example.com",
+        subject="Contract renewal",
+        classification="ACTIONABLE",
+        confidence=92,
+        proposed_response="Thanks, I'll review the contract and reply by Friday.",
+        email_snippet="Could you confirm the renewal terms?",
+    )
+
+
+@pytest.fixture(scope="module")
+def sample_invoice_payload(sample_workflow_id):
+    """Overdue invoice notification payload."""
+    from src.schemas.slack import InvoiceNotificationPayload
+
+    return InvoiceNotificationPayload(
+        workflow_id=sample_workflow_id,
+        client_name="Acme Corp",
+        invoice_number="INV-001",
+        amount="$1,500.00",
+        due_date="2024-01-15",
+        days_overdue=7,
+        proposed_action="Send reminder email",
+    )
+
+
+@pytest.fixture(scope="module")
+def sample_meeting_payload(sample_workflow_id):
+    """Meeting prep notification payload."""
+    from src.schemas.slack import MeetingNotificationPayload
+
+    return MeetingNotificationPayload(
+        workflow_id=sample_workflow_id,
+        meeting_title="Quarterly review",
+        start_time=datetime(2024, 1, 15, 10, 0, 0),
+        attendees=["Alice", "Bob"],
+        context_summary="Review Q4 results and plan Q1 priorities.",
+        proposed_prep="Bring the revenue dashboard.",
+    )
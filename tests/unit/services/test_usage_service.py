@@ -11,6 +11,13 @@ from src.models.usage import UsageCounter
 from src.schemas.usage import AgentUsage, UsageAlert
 from src.services.usage_service import UsageService
 
+# Fixed clock so period boundaries are deterministic across tests
+NOW = datetime(2025, 1, 1, 0, 0, 0)
+PERIOD_END = NOW + timedelta(days=30)
+
+# Plan primary key is the Stripe price ID
+SEED_PLAN_ID = "price_test_123"
+
 
 class TestUsageService:
     """Test suite for UsageService."""
@@ -23,31 +30,34 @@ class TestUsageService:
     @pytest.fixture
     def plan(self, db_session):
         """Create a test plan."""
-        plan = Plan(
-            name="Professional",
-            stripe_price_id="price_test_123",
-            price_cents=4900,
-            limits={
-                "emails_per_month": 1000,
-                "invoices_per_month": 100,
-                "meetings_per_month": 50,
-            },
+        plan = db_session.merge(
+            Plan(
+                id=SEED_PLAN_ID,
+                stripe_product_id="prod_test_123",
+                name="Professional",
+                price_cents=4900,
+                agents_included=["inbox", "invoice", "meeting"],
+                limits={
+                    "emails_per_month": 1000,
+                    "invoices_per_month": 100,
+                    "meetings_per_month": 50,
+                },
+            )
         )
-        db_session.add(plan)
         db_session.commit()
         return plan
 
     @pytest.fixture
     def subscription(self, db_session, tenant_id, plan):
         """Create a test subscription."""
-        now = datetime.utcnow()
         subscription = Subscription(
             tenant_id=tenant_id,
             plan_id=plan.id,
             stripe_subscription_id="sub_test_123",
+            stripe_customer_id="cus_test_123",
             status="active",
-            current_period_start=now,
-            current_period_end=now + timedelta(days=30),
+            current_period_start=NOW,
+            current_period_end=PERIOD_END,
         )
         db_session.add(subscription)
         db_session.commit()
@@ -295,12 +305,10 @@ class TestUsageService:
         assert len(stats.alerts) == 2
 
         # Check inbox warning
-        inbox_alert = next(a for a in stats.alerts if a.agent == "inbox")
-        assert inbox_alert.level == "warning"
+        assert stats.alerts_by_agent["inbox"].level == "warning"
 
         # Check invoice error
-        invoice_alert = next(a for a in stats.alerts if a.agent == "invoice")
-        assert invoice_alert.level == "error"
+        assert stats.alerts_by_agent["invoice"].level == "error"
 
     def test_no_alerts_below_80_percent(
         self, usage_service, db_session, tenant_id, subscription
@@ -341,9 +349,11 @@ class TestUsageService:
         """Test trial user with no limits (or limits set to 0)."""
         # Create trial plan with no limits
         trial_plan = Plan(
+            id="price_trial",
+            stripe_product_id="prod_trial",
             name="Trial",
-            stripe_price_id="price_trial",
             price_cents=0,
+            agents_included=["inbox", "invoice", "meeting"],
             limits={
                 "emails_per_month": 0,
                 "invoices_per_month": 0,
@@ -352,14 +362,14 @@ class TestUsageService:
         )
         db_session.add(trial_plan)
 
-        now = datetime.utcnow()
         subscription = Subscription(
             tenant_id=tenant_id,
             plan_id=trial_plan.id,
             stripe_subscription_id="sub_trial",
+            stripe_customer_id="cus_test_123",
             status="trial",
-            current_period_start=now,
-            current_period_end=now + timedelta(days=14),
+            current_period_start=NOW,
+            current_period_end=NOW + timedelta(days=14),
         )
         db_session.add(subscription)
         db_session.commit()
@@ -399,14 +409,14 @@ class TestUsageService:
     ):
         """Test that 403 is raised when subscription is not active."""
         # Create inactive subscription
-        now = datetime.utcnow()
         subscription = Subscription(
             tenant_id=tenant_id,
             plan_id=plan.id,
             stripe_subscription_id="sub_inactive",
+            stripe_customer_id="cus_test_123",
             status="canceled",
-            current_period_start=now,
-            current_period_end=now + timedelta(days=30),
+            current_period_start=NOW,
+            current_period_end=PERIOD_END,
         )
         db_session.add(subscription)
         db_session.commit()
@@ -422,14 +432,14 @@ class TestUsageService:
     ):
         """Test that 500 is raised when subscription has no plan assigned."""
         # Create subscription without plan
-        now = datetime.utcnow()
         subscription = Subscription(
             tenant_id=tenant_id,
             plan_id=None,  # No plan
             stripe_subscription_id="sub_no_plan",
+            stripe_customer_id="cus_test_123",
             status="active",
-            current_period_start=now,
-            current_period_end=now + timedelta(days=30),
+            current_period_start=NOW,
+            current_period_end=PERIOD_END,
         )
         db_session.add(subscription)
         db_session.commit()
@@ -1,54 +1,78 @@
 """Unit tests for UsageTracker service."""
 
 from datetime import datetime, timedelta
-from uuid import uuid4
 
 import pytest
+from sqlalchemy import insert, select
 from sqlalchemy.exc import IntegrityError
 
 from src.models.billing import Subscription, Plan
 from src.models.usage import UsageEvent, UsageCounter
 from src.services.usage_tracker import UsageTracker
 
+FROZEN_NOW = datetime(2026, 1, 1, 12, 0, 0)
+
+
+class _FrozenDatetime:
+    """datetime stand-in whose utcnow() always returns FROZEN_NOW."""
+
+    utcnow = staticmethod(lambda: FROZEN_NOW)
+
+
+def _counter(session, tenant_id, agent):
+    """Fetch the tenant's counter for an agent."""
+    return session.scalar(
+        select(UsageCounter).where(
+            UsageCounter.tenant_id == tenant_id,
+            UsageCounter.agent == agent,
+        )
+    )
+
+
+def _counter_count(session, tenant_id, agent):
+    """Fetch only the count column of the tenant's counter for an agent."""
+    return session.scalar(
+        select(UsageCounter.count).where(
+            UsageCounter.tenant_id == tenant_id,
+            UsageCounter.agent == agent,
+        )
+    )
+
 
 class TestUsageTracker:
     """Test suite for UsageTracker service."""
 
     @pytest.fixture
-    def tenant_id(self):
-        """Generate a tenant ID."""
-        return uuid4()
+    def tenant_id(self, make_uuid):
+        """Tenant ID that is stable per test and unique per xdist worker."""
+        return make_uuid()
 
     @pytest.fixture
-    def plan(self, db_session):
-        """Create a test plan."""
+    def subscription(self, db_session, tenant_id):
+        """Create a test plan and subscription in a single commit."""
+        now = datetime.utcnow()
         plan = Plan(
+            id="price_test_123",
+            stripe_product_id="prod_test_123",
             name="Professional",
-            stripe_price_id="price_test_123",
             price_cents=4900,
+            agents_included=["inbox", "invoice", "meeting"],
             limits={
                 "emails_per_month": 1000,
                 "invoices_per_month": 100,
                 "meetings_per_month": 50,
             },
         )
-        db_session.add(plan)
-        db_session.commit()
-        return plan
-
-    @pytest.fixture
-    def subscription(self, db_session, tenant_id, plan):
-        """Create a test subscription."""
-        now = datetime.utcnow()
         subscription = Subscription(
             tenant_id=tenant_id,
-            plan_id=plan.id,
+            plan=plan,
             stripe_subscription_id="sub_test_123",
+            stripe_customer_id="cus_test_123",
             status="active",
             current_period_start=now,
             current_period_end=now + timedelta(days=30),
         )
-        db_session.add(subscription)
+        db_session.add_all([plan, subscription])
         db_session.commit()
         return subscription
 
@@ -57,89 +81,78 @@ class TestUsageTracker:
         """Create a UsageTracker instance."""
         return UsageTracker(db_session)
 
+    def _bulk_track(self, db_session, subscription, agent, quantities):
+        """Seed events and their counter directly, bypassing track_event.
+
+        For tests that only need pre-existing usage; writes all rows in one flush.
+        """
+        events = [
+            UsageEvent(
+                tenant_id=subscription.tenant_id,
+                agent=agent,
+                action_type="seed",
+                quantity=quantity,
+                idempotency_key=f"{subscription.tenant_id}:{agent}:seed:{i}",
+            )
+            for i, quantity in enumerate(quantities)
+        ]
+        counter = UsageCounter(
+            tenant_id=subscription.tenant_id,
+            agent=agent,
+            period_start=subscription.current_period_start,
+            period_end=subscription.current_period_end,
+            count=sum(quantities),
+        )
+        db_session.bulk_save_objects([*events, counter])
+        db_session.flush()
+
+    @pytest.mark.parametrize(
+        "quantity,expected",
+        [(1, 1), (1, 2), (5, 5)],
+        ids=["single", "increment", "quantity"],
+    )
     def test_track_event_creates_event_and_increments_counter(
-        self, usage_tracker, db_session, tenant_id, subscription
+        self, usage_tracker, db_session, tenant_id, subscription, make_uuid, quantity, expected
     ):
-        """Test that track_event creates event and increments counter atomically."""
-        # Act
-        event = usage_tracker.track_event(
-            tenant_id=tenant_id,
-            agent="inbox",
-            action_type="email_processed",
-            resource_id=uuid4(),
-            quantity=1,
-            metadata={"test": "data"},
-        )
+        """Test that track_event creates events and increments the counter atomically."""
+        # Act (distinct resource IDs keep idempotency keys unique when
+        # several events land in the same millisecond)
+        for _ in range(expected // quantity):
+            event = usage_tracker.track_event(
+                tenant_id=tenant_id,
+                agent="inbox",
+                action_type="email_processed",
+                resource_id=make_uuid(),
+                quantity=quantity,
+                metadata={"test": "data"},
+            )
 
-        db_session.commit()
+        db_session.flush()
 
         # Assert event created
         assert event.id is not None
         assert event.tenant_id == tenant_id
         assert event.agent == "inbox"
         assert event.action_type == "email_processed"
-        assert event.quantity == 1
+        assert event.quantity == quantity
         assert event.metadata == {"test": "data"}
         assert event.idempotency_key is not None
 
         # Assert counter incremented
-        counter = (
-            db_session.query(UsageCounter)
-            .filter(
-                UsageCounter.tenant_id == tenant_id,
-                UsageCounter.agent == "inbox",
-            )
-            .first()
-        )
+        counter = _counter(db_session, tenant_id, "inbox")
         assert counter is not None
-        assert counter.count == 1
+        assert counter.count == expected
         assert counter.last_event_at is not None
 
-    def test_track_event_increments_existing_counter(
-        self, usage_tracker, db_session, tenant_id, subscription
-    ):
-        """Test that track_event increments existing counter."""
-        # Create first event
-        usage_tracker.track_event(
-            tenant_id=tenant_id,
-            agent="inbox",
-            action_type="email_processed",
-        )
-        db_session.commit()
-
-        # Create second event
-        usage_tracker.track_event(
-            tenant_id=tenant_id,
-            agent="inbox",
-            action_type="email_processed",
-        )
-        db_session.commit()
-
-        # Assert counter incremented to 2
-        counter = (
-            db_session.query(UsageCounter)
-            .filter(
-                UsageCounter.tenant_id == tenant_id,
-                UsageCounter.agent == "inbox",
-            )
-            .first()
-        )
-        assert counter.count == 2
-
     def test_track_event_rejects_duplicate_idempotency_key(
-        self, usage_tracker, db_session, tenant_id, subscription, monkeypatch
+        self, usage_tracker, db_session, tenant_id, subscription, make_uuid, monkeypatch
     ):
         """Test that track_event rejects duplicate events based on idempotency key."""
-        # Mock timestamp to generate same idempotency key
-        fixed_timestamp = datetime(2026, 1, 1, 12, 0, 0)
-
-        def mock_utcnow():
-            return fixed_timestamp
-
-        monkeypatch.setattr("src.services.usage_tracker.datetime", type("datetime", (), {"utcnow": staticmethod(mock_utcnow)}))
-        monkeypatch.setattr("src.models.usage.datetime", type("datetime", (), {"utcnow": staticmethod(mock_utcnow)}))
+        # Freeze the clock so both calls generate the same idempotency key
+        monkeypatch.setattr("src.services.usage_tracker.datetime", _FrozenDatetime)
+        monkeypatch.setattr("src.models.usage.datetime", _FrozenDatetime)
 
-        resource_id = uuid4()
+        resource_id = make_uuid()
 
         # Create first event
         usage_tracker.track_event(
@@ -148,6 +161,7 @@ class TestUsageTracker:
             action_type="email_processed",
             resource_id=resource_id,
         )
+        # Commit (not flush): track_event rolls the session back on the duplicate
         db_session.commit()
 
         # Try to create duplicate event with same parameters
@@ -160,15 +174,8 @@ class TestUsageTracker:
             )
 
         # Counter should still be 1 (duplicate rejected)
-        counter = (
-            db_session.query(UsageCounter)
-            .filter(
-                UsageCounter.tenant_id == tenant_id,
-                UsageCounter.agent == "inbox",
-            )
-            .first()
-        )
-        assert counter.count == 1
+        count = _counter_count(db_session, tenant_id, "inbox")
+        assert count == 1
 
     def test_track_event_creates_counter_for_new_period(
         self, usage_tracker, db_session, tenant_id, subscription
@@ -180,31 +187,22 @@ class TestUsageTracker:
             agent="invoice",
             action_type="invoice_detected",
         )
-        db_session.commit()
+        db_session.flush()
 
         # Assert counter created with correct period
-        counter = (
-            db_session.query(UsageCounter)
-            .filter(
-                UsageCounter.tenant_id == tenant_id,
-                UsageCounter.agent == "invoice",
-            )
-            .first()
-        )
+        counter = _counter(db_session, tenant_id, "invoice")
         assert counter is not None
         assert counter.period_start == subscription.current_period_start
         assert counter.period_end == subscription.current_period_end
         assert counter.count == 1
 
     def test_track_event_raises_error_for_no_subscription(
-        self, usage_tracker, db_session
+        self, usage_tracker, orphan_tenant_id
     ):
         """Test that track_event raises ValueError when tenant has no subscription."""
-        tenant_without_subscription = uuid4()
-
         with pytest.raises(ValueError, match="has no subscription"):
             usage_tracker.track_event(
-                tenant_id=tenant_without_subscription,
+                tenant_id=orphan_tenant_id,
                 agent="inbox",
                 action_type="email_processed",
             )
@@ -220,35 +218,11 @@ class TestUsageTracker:
                 action_type="some_action",
             )
 
-    def test_track_event_handles_quantity_parameter(
-        self, usage_tracker, db_session, tenant_id, subscription
-    ):
-        """Test that track_event respects quantity parameter."""
-        # Create event with quantity=5
-        usage_tracker.track_event(
-            tenant_id=tenant_id,
-            agent="meeting",
-            action_type="meeting_prep",
-            quantity=5,
-        )
-        db_session.commit()
-
-        # Assert counter incremented by 5
-        counter = (
-            db_session.query(UsageCounter)
-            .filter(
-                UsageCounter.tenant_id == tenant_id,
-                UsageCounter.agent == "meeting",
-            )
-            .first()
-        )
-        assert counter.count == 5
-
     def test_track_event_transaction_rollback_on_failure(
         self, usage_tracker, db_session, tenant_id, subscription, monkeypatch
     ):
         """Test that transaction rolls back on failure, leaving DB consistent."""
-        # Create first successful event
+        # Create first successful event; commit so the failure's rollback keeps it
         usage_tracker.track_event(
             tenant_id=tenant_id,
             agent="inbox",
@@ -274,49 +248,60 @@ class TestUsageTracker:
                 action_type="email_processed",
             )
 
-        # Verify counter is still 1 (not incremented by failed transaction)
-        db_session.rollback()
-        counter = (
-            db_session.query(UsageCounter)
-            .filter(
-                UsageCounter.tenant_id == tenant_id,
-                UsageCounter.agent == "inbox",
-            )
-            .first()
-        )
-        assert counter.count == 1
+        # Verify counter is still 1; track_event already rolled the session back
+        count = _counter_count(db_session, tenant_id, "inbox")
+        assert count == 1
 
     def test_track_event_separate_counters_per_agent(
         self, usage_tracker, db_session, tenant_id, subscription
     ):
         """Test that each agent type has separate counter."""
-        # Create events for different agents
-        usage_tracker.track_event(
-            tenant_id=tenant_id,
-            agent="inbox",
-            action_type="email_processed",
+        # Seed invoice and meeting usage in one multi-row INSERT per table
+        seeded = [("invoice", "invoice_detected"), ("meeting", "meeting_prep")]
+        db_session.execute(
+            insert(UsageEvent),
+            [
+                {
+                    "tenant_id": tenant_id,
+                    "agent": agent,
+                    "action_type": action_type,
+                    "quantity": 1,
+                    "idempotency_key": f"{tenant_id}:{agent}:seed:{action_type}",
+                }
+                for agent, action_type in seeded
+            ],
         )
-        usage_tracker.track_event(
-            tenant_id=tenant_id,
-            agent="invoice",
-            action_type="invoice_detected",
+        db_session.execute(
+            insert(UsageCounter),
+            [
+                {
+                    "tenant_id": tenant_id,
+                    "agent": agent,
+                    "period_start": subscription.current_period_start,
+                    "period_end": subscription.current_period_end,
+                    "count": 1,
+                }
+                for agent, _ in seeded
+            ],
         )
+
+        # Track an inbox event; it must get its own counter
         usage_tracker.track_event(
             tenant_id=tenant_id,
-            agent="meeting",
-            action_type="meeting_prep",
+            agent="inbox",
+            action_type="email_processed",
         )
-        db_session.commit()
+        db_session.flush()
 
         # Assert separate counters created
-        counters = (
-            db_session.query(UsageCounter)
-            .filter(UsageCounter.tenant_id == tenant_id)
-            .all()
-        )
-        assert len(counters) == 3
+        rows = db_session.execute(
+            select(UsageCounter.agent, UsageCounter.count).where(
+                UsageCounter.tenant_id == tenant_id
+            )
+        ).all()
+        assert len(rows) == 3
 
-        agent_counts = {c.agent: c.count for c in counters}
+        agent_counts = dict(rows)
         assert agent_counts["inbox"] == 1
         assert agent_counts["invoice"] == 1
         assert agent_counts["meeting"] == 1
@@ -325,36 +310,23 @@ class TestUsageTracker:
         self, usage_tracker, db_session, tenant_id, subscription
     ):
         """Test get_current_count returns correct count."""
-        # Create some events
-        usage_tracker.track_event(
-            tenant_id=tenant_id,
-            agent="inbox",
-            action_type="email_processed",
-        )
-        usage_tracker.track_event(
-            tenant_id=tenant_id,
-            agent="inbox",
-            action_type="email_processed",
-        )
-        db_session.commit()
+        # Seed some usage
+        self._bulk_track(db_session, subscription, "inbox", [1, 1])
 
         # Get count
         count = usage_tracker.get_current_count(tenant_id, "inbox")
         assert count == 2
 
     def test_get_current_count_returns_zero_for_no_subscription(
-        self, usage_tracker
+        self, usage_tracker, orphan_tenant_id
     ):
         """Test get_current_count returns 0 when no subscription exists."""
-        tenant_without_subscription = uuid4()
-        count = usage_tracker.get_current_count(
-            tenant_without_subscription, "inbox"
-        )
+        count = usage_tracker.get_current_count(orphan_tenant_id, "inbox")
         assert count == 0
 
-    def test_idempotency_key_format(self, usage_tracker, tenant_id):
+    def test_idempotency_key_format(self, usage_tracker, tenant_id, make_uuid):
         """Test idempotency key generation format."""
-        resource_id = uuid4()
+        resource_id = make_uuid()
         key = usage_tracker._generate_idempotency_key(
             tenant_id, "inbox", "email_processed", resource_id
         )
@@ -7,12 +7,47 @@ from src.services.billing_service import BillingService
 from src.models.billing import Plan, Subscription
 
 
+@pytest.fixture(scope="module")
+def sample_plan(db_session_module):
+    """Create the Bundle plan once per module."""
+    plan = Plan(
+        id="price_bundle_test",
+        stripe_product_id="prod_bundle_test",
+        name="Bundle",
+        price_cents=4900,
+        agents_included=["inbox", "invoice", "meeting"],
+        limits={
+            "emails_per_month": 500,
+            "invoices_per_month": 50,
+            "meetings_per_month": 30,
+        },
+    )
+    db_session_module.add(plan)
+    db_session_module.commit()
+    return plan
+
+
+@pytest.fixture(scope="module")
+def sample_subscription(db_session_module, sample_plan):
+    """Create a trial subscription once per module."""
+    subscription = Subscription(
+        tenant_id=uuid4(),
+        stripe_customer_id="cus_test123",
+        plan_id=sample_plan.id,
+        status="trial",
+        trial_ends_at=datetime.utcnow() + timedelta(days=14),
+    )
+    db_session_module.add(subscription)
+    db_session_module.commit()
+    return subscription
+
+
 class TestBillingService:
     """Tests for BillingService."""
 
-    def test_get_active_plans(self, db_session, sample_plan):
+    def test_get_active_plans(self, db_session_nested, sample_plan):
         """Test retrieving active plans."""
-        service = BillingService(db_session)
+        service = BillingService(db_session_nested)
         plans = service.get_active_plans()
 
         assert len(plans) == 1
@@ -20,25 +55,25 @@ class TestBillingService:
         assert plans[0].name == "Bundle"
         assert plans[0].price_cents == 4900
 
-    def test_get_subscription(self, db_session, sample_subscription):
+    def test_get_subscription(self, db_session_nested, sample_subscription):
         """Test retrieving a subscription."""
-        service = BillingService(db_session)
+        service = BillingService(db_session_nested)
         sub = service.get_subscription(sample_subscription.tenant_id)
 
         assert sub is not None
         assert sub.status == "trial"
         assert sub.stripe_customer_id == "cus_test123"
 
-    def test_get_subscription_not_found(self, db_session):
+    def test_get_subscription_not_found(self, db_session_nested):
         """Test retrieving non-existent subscription."""
-        service = BillingService(db_session)
+        service = BillingService(db_session_nested)
         sub = service.get_subscription(uuid4())
 
         assert sub is None
 
-    def test_create_trial_subscription(self, db_session, mock_stripe):
+    def test_create_trial_subscription(self, db_session_nested, mock_stripe):
         """Test creating a trial subscription."""
-        service = BillingService(db_session)
+        service = BillingService(db_session_nested)
         tenant_id = uuid4()
 
         sub = service.create_trial_subscription(
@@ -55,10 +90,10 @@ class TestBillingService:
         mock_stripe["customer"].assert_called_once()
 
     def test_create_trial_subscription_already_exists(
-        self, db_session, sample_subscription, mock_stripe
+        self, db_session_nested, sample_subscription, mock_stripe
     ):
         """Test creating trial when subscription already exists."""
-        service = BillingService(db_session)
+        service = BillingService(db_session_nested)
 
         # Should return existing subscription
         sub = service.create_trial_subscription(
@@ -70,14 +105,14 @@ class TestBillingService:
         # Stripe Customer should NOT be called
         mock_stripe["customer"].assert_not_called()
 
-    def test_subscription_is_active(self, db_session, sample_subscription):
+    def test_subscription_is_active(self, db_session_nested, sample_subscription):
         """Test subscription is_active property."""
         assert sample_subscription.is_active is True
 
         sample_subscription.status = "canceled"
         assert sample_subscription.is_active is False
 
-    def test_days_remaining_in_trial(self, db_session):
+    def test_days_remaining_in_trial(self, db_session_nested):
         """Test days_remaining_in_trial property."""
         tenant_id = uuid4()
         sub = Subscription(
@@ -86,22 +121,22 @@ class TestBillingService:
             status="trial",
             trial_ends_at=datetime.utcnow() + timedelta(days=7),
         )
-        db_session.add(sub)
-        db_session.commit()
+        db_session_nested.add(sub)
+        db_session_nested.flush()
 
         # Should be approximately 7 days (might be 6 depending on timing)
         assert sub.days_remaining_in_trial in (6, 7)
 
-    def test_days_remaining_not_in_trial(self, db_session, sample_subscription):
+    def test_days_remaining_not_in_trial(self, db_session_nested, sample_subscription):
         """Test days_remaining when not in trial."""
         sample_subscription.status = "active"
-        db_session.commit()
+        db_session_nested.flush()
 
         assert sample_subscription.days_remaining_in_trial is None
 
-    def test_check_expired_trials(self, db_session):
+    def test_check_expired_trials(self, db_session_nested):
         """Test checking and expiring old trials."""
-        service = BillingService(db_session)
+        service = BillingService(db_session_nested)
 
         # Create an expired trial
         tenant_id = uuid4()
@@ -111,14 +146,14 @@ class TestBillingService:
             status="trial",
             trial_ends_at=datetime.utcnow() - timedelta(days=1),
         )
-        db_session.add(sub)
-        db_session.commit()
+        db_session_nested.add(sub)
+        db_session_nested.flush()
 
         # Run expiration check
         expired_count = service.check_expired_trials()
 
         assert expired_count == 1
-        db_session.refresh(sub)
+        db_session_nested.expire(sub, ["status"])
         assert sub.status == "expired"
 
 
@@ -126,10 +161,10 @@ class TestBillingServiceCheckout:
     """Tests for checkout functionality."""
 
     def test_create_checkout_session(
-        self, db_session, sample_subscription, mock_stripe
+        self, db_session_nested, sample_subscription, mock_stripe
     ):
         """Test creating a checkout session."""
-        service = BillingService(db_session)
+        service = BillingService(db_session_nested)
 
         url = service.create_checkout_session(
             tenant_id=sample_subscription.tenant_id,
@@ -142,13 +177,13 @@ class TestBillingServiceCheckout:
         mock_stripe["checkout"].assert_called_once()
 
     def test_create_checkout_already_active(
-        self, db_session, sample_subscription, mock_stripe
+        self, db_session_nested, sample_subscription, mock_stripe
     ):
         """Test creating checkout when already active."""
         sample_subscription.status = "active"
-        db_session.commit()
+        db_session_nested.flush()
 
-        service = BillingService(db_session)
+        service = BillingService(db_session_nested)
 
         with pytest.raises(ValueError, match="Already have an active subscription"):
             service.create_checkout_session(
@@ -163,10 +198,10 @@ class TestBillingServicePortal:
     """Tests for customer portal functionality."""
 
     def test_create_portal_session(
-        self, db_session, sample_subscription, mock_stripe
+        self, db_session_nested, sample_subscription, mock_stripe
     ):
         """Test creating a portal session."""
-        service = BillingService(db_session)
+        service = BillingService(db_session_nested)
 
         url = service.create_portal_session(
             tenant_id=sample_subscription.tenant_id,
@@ -176,9 +211,9 @@ class TestBillingServicePortal:
         assert url == "https://billing.stripe.com/test"
         mock_stripe["portal"].assert_called_once()
 
-    def test_create_portal_no_subscription(self, db_session, mock_stripe):
+    def test_create_portal_no_subscription(self, db_session_nested, mock_stripe):
         """Test creating portal without subscription."""
-        service = BillingService(db_session)
+        service = BillingService(db_session_nested)
 
         with pytest.raises(ValueError, match="No subscription found"):
             service.create_portal_session(
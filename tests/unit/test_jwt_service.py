@@ -2,8 +2,7 @@
 Unit tests for JWTService.
 """
 
-import time
-from datetime import timedelta
+from datetime import datetime, timedelta, timezone
 from uuid import uuid4
 
 import pytest
@@ -12,105 +11,125 @@ from src.core.exceptions import InvalidTokenError, TokenExpiredError
 from src.services.jwt import JWTService
 
 
-class TestJWTService:
-    """Tests for JWTService."""
+class _HourAgoDatetime(datetime):
+    """datetime whose now() runs one hour behind the real clock."""
 
-    def test_create_and_verify_token(self, rsa_keys: tuple[str, str]):
-        """Test that creating and verifying a token works."""
-        private_key, public_key = rsa_keys
-        service = JWTService(
-            private_key=private_key,
-            public_key=public_key,
-        )
-        user_id = uuid4()
+    @classmethod
+    def now(cls, tz=None):
+        return datetime.now(tz) - timedelta(hours=1)
 
-        token = service.create_access_token(user_id)
-        payload = service.verify_token(token)
 
-        assert payload["sub"] == str(user_id)
-        assert payload["type"] == "access"
+def _assert_subject_and_type(payload: dict, user_id) -> None:
+    assert payload["sub"] == str(user_id)
+    assert payload["type"] == "access"
 
-    def test_token_contains_required_claims(self, rsa_keys: tuple[str, str]):
-        """Test that token contains all required claims."""
-        private_key, public_key = rsa_keys
-        service = JWTService(
-            private_key=private_key,
-            public_key=public_key,
-        )
-        user_id = uuid4()
 
-        token = service.create_access_token(user_id)
-        payload = service.verify_token(token)
+def _assert_required_claims(payload: dict, user_id) -> None:
+    for claim in ("sub", "exp", "iat", "type"):
+        assert claim in payload
 
-        assert "sub" in payload
-        assert "exp" in payload
-        assert "iat" in payload
-        assert "type" in payload
 
-    def test_get_user_id_from_token(self, rsa_keys: tuple[str, str]):
-        """Test extracting user ID from token."""
-        private_key, public_key = rsa_keys
-        service = JWTService(
+def _assert_additional_claims(payload: dict, user_id) -> None:
+    assert payload["role"] == "admin"
+    assert payload["org_id"] == "org-123"
+
+
+class TestJWTService:
+    """Tests for JWTService."""
+
+    @pytest.fixture(
+        scope="module",
+        params=[("rsa_keys", "RS256"), ("ec_keys", "ES256")],
+        ids=["RS256", "ES256"],
+    )
+    def signing_keys(self, request) -> tuple[str, str, str]:
+        """Key pair and algorithm; ES256 keys are much cheaper to generate and sign with."""
+        keys_fixture, algorithm = request.param
+        private_key, public_key = request.getfixturevalue(keys_fixture)
+        return private_key, public_key, algorithm
+
+    @pytest.fixture(scope="module")
+    def jwt_service(self, signing_keys: tuple[str, str, str]) -> JWTService:
+        """JWTService with default expiry, built once per key pair."""
+        private_key, public_key, algorithm = signing_keys
+        return JWTService(
             private_key=private_key,
             public_key=public_key,
+            algorithm=algorithm,
         )
-        user_id = uuid4()
 
-        token = service.create_access_token(user_id)
-        extracted_id = service.get_user_id_from_token(token)
+    @pytest.fixture(scope="module")
+    def signed_tokens(self, jwt_service: JWTService) -> dict:
+        """Tokens signed once per key pair, for tests that only verify."""
+        user_id = uuid4()
+        access = jwt_service.create_access_token(user_id)
+
+        return {
+            "user_id": user_id,
+            "access": access,
+            "access_with_claims": jwt_service.create_access_token(
+                user_id, additional_claims={"role": "admin", "org_id": "org-123"}
+            ),
+            "tampered": access[:-5] + "XXXXX",
+        }
+
+    @pytest.fixture(scope="module")
+    def verified_payload(self, jwt_service: JWTService, signed_tokens: dict) -> dict:
+        """Payload of the claims-bearing token, verified once per key pair."""
+        return jwt_service.verify_token(signed_tokens["access_with_claims"])
+
+    @pytest.mark.parametrize(
+        "check",
+        [_assert_subject_and_type, _assert_required_claims, _assert_additional_claims],
+        ids=["subject", "required_claims", "additional_claims"],
+    )
+    def test_verify_token_payload(self, verified_payload: dict, signed_tokens: dict, check):
+        """Test that a created token verifies to the expected payload."""
+        check(verified_payload, signed_tokens["user_id"])
+
+    def test_get_user_id_from_token(self, jwt_service: JWTService, signed_tokens: dict):
+        """Test extracting user ID from token."""
+        extracted_id = jwt_service.get_user_id_from_token(signed_tokens["access"])
 
-        assert extracted_id == user_id
+        assert extracted_id == signed_tokens["user_id"]
 
-    def test_expired_token_raises_error(self, rsa_keys: tuple[str, str]):
+    def test_expired_token_raises_error(
+        self, signing_keys: tuple[str, str, str], monkeypatch: pytest.MonkeyPatch
+    ):
         """Test that expired token raises TokenExpiredError."""
-        private_key, public_key = rsa_keys
-        # Create service with very short expiration
+        private_key, public_key, algorithm = signing_keys
         service = JWTService(
             private_key=private_key,
             public_key=public_key,
-            access_token_expire_minutes=0,  # Expires immediately
+            algorithm=algorithm,
+            access_token_expire_minutes=1,
         )
         user_id = uuid4()
 
-        token = service.create_access_token(user_id)
-        time.sleep(1)  # Wait for expiration
+        # Issue the token an hour in the past so it is already expired
+        with monkeypatch.context() as m:
+            m.setattr("src.services.jwt.datetime", _HourAgoDatetime)
+            token = service.create_access_token(user_id)
 
         with pytest.raises(TokenExpiredError):
             service.verify_token(token)
 
-    def test_invalid_token_raises_error(self, rsa_keys: tuple[str, str]):
+    def test_invalid_token_raises_error(self, jwt_service: JWTService):
         """Test that invalid token raises InvalidTokenError."""
-        private_key, public_key = rsa_keys
-        service = JWTService(
-            private_key=private_key,
-            public_key=public_key,
-        )
-
         with pytest.raises(InvalidTokenError):
-            service.verify_token("not-a-valid-token")
+            jwt_service.verify_token("not-a-valid-token")
 
-    def test_tampered_token_raises_error(self, rsa_keys: tuple[str, str]):
+    def test_tampered_token_raises_error(self, jwt_service: JWTService, signed_tokens: dict):
         """Test that tampered token raises InvalidTokenError."""
-        private_key, public_key = rsa_keys
-        service = JWTService(
-            private_key=private_key,
-            public_key=public_key,
-        )
-        user_id = uuid4()
-
-        token = service.create_access_token(user_id)
-        # Tamper with the token
-        tampered = token[:-5] + "XXXXX"
-
         with pytest.raises(InvalidTokenError):
-            service.verify_token(tampered)
+            jwt_service.verify_token(signed_tokens["tampered"])
 
-    def test_token_with_wrong_key_raises_error(self, rsa_keys: tuple[str, str]):
+    def test_token_with_wrong_key_raises_error(
+        self, rsa_keys: tuple[str, str], rsa_keys_alt: tuple[str, str]
+    ):
         """Test that token signed with different key raises error."""
         private_key1, public_key1 = rsa_keys
-        # Generate different key pair
-        from tests.conftest import generate_rsa_keys
-        private_key2, public_key2 = generate_rsa_keys()
+        private_key2, public_key2 = rsa_keys_alt
 
         service1 = JWTService(private_key=private_key1, public_key=public_key1)
         service2 = JWTService(private_key=private_key2, public_key=public_key2)
@@ -120,28 +139,13 @@ class TestJWTService:
         with pytest.raises(InvalidTokenError):
             service2.verify_token(token)
 
-    def test_additional_claims_included(self, rsa_keys: tuple[str, str]):
-        """Test that additional claims are included in token."""
-        private_key, public_key = rsa_keys
-        service = JWTService(
-            private_key=private_key,
-            public_key=public_key,
-        )
-        user_id = uuid4()
-        additional = {"role": "admin", "org_id": "org-123"}
-
-        token = service.create_access_token(user_id, additional_claims=additional)
-        payload = service.verify_token(token)
-
-        assert payload["role"] == "admin"
-        assert payload["org_id"] == "org-123"
-
-    def test_get_token_expiration(self, rsa_keys: tuple[str, str]):
+    def test_get_token_expiration(self, signing_keys: tuple[str, str, str]):
         """Test getting token expiration time."""
-        private_key, public_key = rsa_keys
+        private_key, public_key, algorithm = signing_keys
         service = JWTService(
             private_key=private_key,
             public_key=public_key,
+            algorithm=algorithm,
             access_token_expire_minutes=60,
         )
         user_id = uuid4()
@@ -150,21 +154,15 @@ class TestJWTService:
         expiration = service.get_token_expiration(token)
 
         # Should expire roughly 60 minutes from now
-        from datetime import datetime, timezone
         now = datetime.now(timezone.utc)
         diff = (expiration - now).total_seconds()
         assert 3500 < diff < 3700  # Allow some variance
 
-    def test_user_id_string_accepted(self, rsa_keys: tuple[str, str]):
+    def test_user_id_string_accepted(self, jwt_service: JWTService):
         """Test that user ID as string is accepted."""
-        private_key, public_key = rsa_keys
-        service = JWTService(
-            private_key=private_key,
-            public_key=public_key,
-        )
         user_id = str(uuid4())
 
-        token = service.create_access_token(user_id)
-        payload = service.verify_token(token)
+        token = jwt_service.create_access_token(user_id)
+        payload = jwt_service.verify_token(token)
 
         assert payload["sub"] == user_id
@@ -13,56 +13,100 @@ from src.integrations.slack.blocks import (
 )
 from src.schemas.slack import ActionResult
 
+FIXED_TS = datetime(2024, 1, 1, 0, 0, 0)
 
-class TestEmailNotification:
-    """Tests for email notification blocks."""
 
-    def test_build_email_notification_basic(self, sample_email_payload):
-        """Test basic email notification structure."""
-        blocks = build_email_notification(sample_email_payload)
+def contains_text(obj, needle: str, casefold: bool = False) -> bool:
+    """Return True if any string leaf in a block structure contains ``needle``.
 
-        assert isinstance(blocks, list)
-        assert len(blocks) > 0
+    With ``casefold`` the comparison ignores case.
+    """
+    if isinstance(obj, str):
+        if casefold:
+            return needle.casefold() in obj.casefold()
+        return needle in obj
+    if isinstance(obj, dict):
+        return any(contains_text(v, needle, casefold) for v in obj.values())
+    if isinstance(obj, list):
+        return any(contains_text(v, needle, casefold) for v in obj)
+    return False
 
-        # Check header
-        header = blocks[0]
-        assert header["type"] == "header"
-        assert "Email" in header["text"]["text"]
 
-    def test_build_email_notification_has_sender_subject(self, sample_email_payload):
-        """Test that sender and subject are included."""
-        blocks = build_email_notification(sample_email_payload)
+@pytest.fixture(scope="module")
+def email_blocks(sample_email_payload):
+    """Email notification blocks, built once per module."""
+    return build_email_notification(sample_email_payload)
+
+
+@pytest.fixture(scope="module")
+def invoice_blocks(sample_invoice_payload):
+    """Invoice notification blocks, built once per module."""
+    return build_invoice_notification(sample_invoice_payload)
+
+
+@pytest.fixture(scope="module")
+def meeting_blocks(sample_meeting_payload):
+    """Meeting notification blocks, built once per module."""
+    return build_meeting_notification(sample_meeting_payload)
+
 
+@pytest.fixture(scope="module")
+def welcome_blocks():
+    """Welcome message blocks, built once per module."""
+    return build_welcome_message("Test Workspace")
+
+
+@pytest.mark.parametrize(
+    "fixture_name,header_kw",
+    [
+        pytest.param("email_blocks", "Email", id="email"),
+        pytest.param("invoice_blocks", "Invoice", id="invoice"),
+        pytest.param("meeting_blocks", "Meeting", id="meeting"),
+    ],
+)
+def test_build_notification_basic(request, fixture_name, header_kw):
+    """Test basic notification structure for each builder."""
+    blocks = request.getfixturevalue(fixture_name)
+
+    assert isinstance(blocks, list)
+    assert len(blocks) > 0
+
+    # Check header
+    header = blocks[0]
+    assert header["type"] == "header"
+    assert header_kw in header["text"]["text"]
+
+
+class TestEmailNotification:
+    """Tests for email notification blocks."""
+
+    def test_build_email_notification_has_sender_subject(self, email_blocks, sample_email_payload):
+        """Test that sender and subject are included."""
         # Find section with fields
-        section_blocks = [b for b in blocks if b.get("type") == "section"]
+        section_blocks = [b for b in email_blocks if b.get("type") == "section"]
         assert len(section_blocks) > 0
 
         # Check for sender and subject in fields
-        all_text = str(blocks)
-        assert sample_email_payload.sender in all_text
-        assert sample_email_payload.subject in all_text
-
-    def test_build_email_notification_has_action_buttons(self, sample_email_payload):
-        """Test that action buttons are present."""
-        blocks = build_email_notification(sample_email_payload)
-
+        assert contains_text(email_blocks, sample_email_payload.sender)
+        assert contains_text(email_blocks, sample_email_payload.subject)
+
+    @pytest.mark.parametrize(
+        "action_id", ["approve_action", "reject_action", "edit_action", "snooze_action"]
+    )
+    def test_build_email_notification_has_action_buttons(self, email_blocks, action_id):
+        """Test that each action button is present."""
         # Find actions block
-        actions_blocks = [b for b in blocks if b.get("type") == "actions"]
+        actions_blocks = [b for b in email_blocks if b.get("type") == "actions"]
         assert len(actions_blocks) == 1
 
         actions = actions_blocks[0]
-        button_ids = [e.get("action_id") for e in actions.get("elements", [])]
+        button_ids = {e.get("action_id") for e in actions.get("elements", [])}
 
-        assert "approve_action" in button_ids
-        assert "reject_action" in button_ids
-        assert "edit_action" in button_ids
-        assert "snooze_action" in button_ids
+        assert action_id in button_ids
 
-    def test_build_email_notification_includes_workflow_id(self, sample_email_payload):
+    def test_build_email_notification_includes_workflow_id(self, email_blocks, sample_email_payload):
         """Test that workflow ID is in button values."""
-        blocks = build_email_notification(sample_email_payload)
-
-        actions_block = [b for b in blocks if b.get("type") == "actions"][0]
+        actions_block = [b for b in email_blocks if b.get("type") == "actions"][0]
         button_values = [e.get("value") for e in actions_block.get("elements", [])]
 
         assert str(sample_email_payload.workflow_id) in button_values
@@ -71,48 +115,18 @@ class TestEmailNotification:
 class TestInvoiceNotification:
     """Tests for invoice notification blocks."""
 
-    def test_build_invoice_notification_basic(self, sample_invoice_payload):
-        """Test basic invoice notification structure."""
-        blocks = build_invoice_notification(sample_invoice_payload)
-
-        assert isinstance(blocks, list)
-        assert len(blocks) > 0
-
-        # Check header
-        header = blocks[0]
-        assert header["type"] == "header"
-        assert "Invoice" in header["text"]["text"]
-
-    def test_build_invoice_notification_shows_overdue(self, sample_invoice_payload):
+    def test_build_invoice_notification_shows_overdue(self, invoice_blocks):
         """Test that overdue status is shown."""
-        blocks = build_invoice_notification(sample_invoice_payload)
-        all_text = str(blocks)
-
-        assert "overdue" in all_text.lower()
+        assert contains_text(invoice_blocks, "overdue", casefold=True)
 
 
 class TestMeetingNotification:
     """Tests for meeting notification blocks."""
 
-    def test_build_meeting_notification_basic(self, sample_meeting_payload):
-        """Test basic meeting notification structure."""
-        blocks = build_meeting_notification(sample_meeting_payload)
-
-        assert isinstance(blocks, list)
-        assert len(blocks) > 0
-
-        # Check header
-        header = blocks[0]
-        assert header["type"] == "header"
-        assert "Meeting" in header["text"]["text"]
-
-    def test_build_meeting_notification_has_attendees(self, sample_meeting_payload):
+    def test_build_meeting_notification_has_attendees(self, meeting_blocks):
         """Test that attendees are shown."""
-        blocks = build_meeting_notification(sample_meeting_payload)
-        all_text = str(blocks)
-
-        assert "Alice" in all_text
-        assert "Bob" in all_text
+        assert contains_text(meeting_blocks, "Alice")
+        assert contains_text(meeting_blocks, "Bob")
 
 
 class TestSuccessBlocks:
@@ -125,7 +139,7 @@ class TestSuccessBlocks:
             workflow_id=sample_workflow_id,
             action="approve",
             summary="Email sent successfully.",
-            timestamp=datetime.utcnow(),
+            timestamp=FIXED_TS,
         )
 
         blocks = build_success_blocks(result)
@@ -134,9 +148,8 @@ class TestSuccessBlocks:
         assert len(blocks) > 0
 
         # Check contains success indicator
-        all_text = str(blocks)
-        assert "completed" in all_text.lower()
-        assert result.summary in all_text
+        assert contains_text(blocks, "completed", casefold=True)
+        assert contains_text(blocks, result.summary)
 
 
 class TestEditModal:
@@ -164,18 +177,15 @@ class TestEditModal:
 class TestWelcomeMessage:
     """Tests for welcome message."""
 
-    def test_build_welcome_message(self):
+    def test_build_welcome_message(self, welcome_blocks):
         """Test welcome message structure."""
-        blocks = build_welcome_message("Test Workspace")
-
-        assert isinstance(blocks, list)
-        assert len(blocks) > 0
+        assert isinstance(welcome_blocks, list)
+        assert len(welcome_blocks) > 0
 
         # Check header
-        header = blocks[0]
+        header = welcome_blocks[0]
         assert header["type"] == "header"
         assert "Welcome" in header["text"]["text"]
 
         # Check team name is included
-        all_text = str(blocks)
-        assert "Test Workspace" in all_text
+        assert contains_text(welcome_blocks, "Test Workspace")
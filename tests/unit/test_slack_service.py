@@ -8,13 +8,41 @@ from src.services.slack_service import SlackService, SlackNotConnectedError
 from src.models.slack_installation import SlackInstallation
 from src.schemas.slack import SlackStatusResponse
 
+FIXED_TS = datetime(2024, 1, 1, 0, 0, 0)
+
+# Attribute list computed once so each spec'd mock skips introspecting the model
+_INSTALLATION_SPEC = [name for name in dir(SlackInstallation) if not name.startswith("_")]
+
+
+def set_db_first(mock_db, value):
+    """Make ``db.query(...).filter(...).first()`` return ``value``."""
+    mock_db.query.return_value.filter.return_value.first.return_value = value
+
+
+@pytest.fixture(autouse=True)
+def patched_settings():
+    """Settings as seen by SlackService; no encryption key unless a test sets one."""
+    with patch("src.services.slack_service.settings") as mock_settings:
+        mock_settings.ENCRYPTION_KEY = None
+        yield mock_settings
+
+
+@pytest.fixture
+def make_installation():
+    """Factory for SlackInstallation mocks with the given attributes."""
+    def _make(**attrs):
+        installation = MagicMock(spec=_INSTALLATION_SPEC)
+        installation.configure_mock(**attrs)
+        return installation
+    return _make
+
 
 class TestSlackServiceGetStatus:
     """Tests for SlackService.get_status()."""
 
     def test_get_status_not_connected(self, mock_db, sample_user_id):
         """Test status when user has no Slack connection."""
-        mock_db.query.return_value.filter.return_value.first.return_value = None
+        set_db_first(mock_db, None)
 
         service = SlackService(db=mock_db)
         status = service.get_status(sample_user_id)
@@ -22,18 +50,18 @@ class TestSlackServiceGetStatus:
         assert status.connected is False
         assert status.team_name is None
 
-    def test_get_status_connected(self, mock_db, sample_user_id):
+    def test_get_status_connected(self, mock_db, sample_user_id, make_installation):
         """Test status when user has active Slack connection."""
-        # Create mock installation
-        mock_installation = MagicMock(spec=SlackInstallation)
-        mock_installation.is_connected = True
-        mock_installation.is_active = True
-        mock_installation.team_name = "Test Workspace"
-        mock_installation.team_id = "T12345"
-        mock_installation.installed_at = datetime.utcnow()
-        mock_installation.bot_access_token = "encrypted-token"
+        mock_installation = make_installation(
+            is_connected=True,
+            is_active=True,
+            team_name="Test Workspace",
+            team_id="T12345",
+            installed_at=FIXED_TS,
+            bot_access_token="encrypted-token",
+        )
 
-        mock_db.query.return_value.filter.return_value.first.return_value = mock_installation
+        set_db_first(mock_db, mock_installation)
 
         service = SlackService(db=mock_db)
         status = service.get_status(sample_user_id)
@@ -46,12 +74,11 @@ class TestSlackServiceGetStatus:
 class TestSlackServiceGetInstallation:
     """Tests for SlackService.get_installation()."""
 
-    def test_get_installation_exists(self, mock_db, sample_user_id):
+    def test_get_installation_exists(self, mock_db, sample_user_id, make_installation):
         """Test getting existing installation."""
-        mock_installation = MagicMock(spec=SlackInstallation)
-        mock_installation.is_active = True
+        mock_installation = make_installation(is_active=True)
 
-        mock_db.query.return_value.filter.return_value.first.return_value = mock_installation
+        set_db_first(mock_db, mock_installation)
 
         service = SlackService(db=mock_db)
         result = service.get_installation(sample_user_id)
@@ -61,7 +88,7 @@ class TestSlackServiceGetInstallation:
 
     def test_get_installation_not_found(self, mock_db, sample_user_id):
         """Test getting non-existent installation."""
-        mock_db.query.return_value.filter.return_value.first.return_value = None
+        set_db_first(mock_db, None)
 
         service = SlackService(db=mock_db)
         result = service.get_installation(sample_user_id)
@@ -72,12 +99,11 @@ class TestSlackServiceGetInstallation:
 class TestSlackServiceDisconnect:
     """Tests for SlackService.disconnect()."""
 
-    def test_disconnect_success(self, mock_db, sample_user_id):
+    def test_disconnect_success(self, mock_db, sample_user_id, make_installation):
         """Test successful disconnection."""
-        mock_installation = MagicMock(spec=SlackInstallation)
-        mock_installation.is_active = True
+        mock_installation = make_installation(is_active=True)
 
-        mock_db.query.return_value.filter.return_value.first.return_value = mock_installation
+        set_db_first(mock_db, mock_installation)
 
         service = SlackService(db=mock_db)
         result = service.disconnect(sample_user_id)
@@ -88,7 +114,7 @@ class TestSlackServiceDisconnect:
 
     def test_disconnect_not_found(self, mock_db, sample_user_id):
         """Test disconnection when no installation exists."""
-        mock_db.query.return_value.filter.return_value.first.return_value = None
+        set_db_first(mock_db, None)
 
         service = SlackService(db=mock_db)
         result = service.disconnect(sample_user_id)
@@ -99,36 +125,29 @@ class TestSlackServiceDisconnect:
 class TestSlackServiceEncryption:
     """Tests for encryption/decryption."""
 
-    def test_encrypt_decrypt_roundtrip(self):
+    @pytest.mark.slow
+    def test_encrypt_decrypt_roundtrip(self, patched_settings, encryption_key):
         """Test that encryption and decryption work correctly."""
-        with patch.dict("os.environ", {"ENCRYPTION_KEY": "dGVzdC1lbmNyeXB0aW9uLWtleS0zMi1ieXRlcw=="}):
-            from cryptography.fernet import Fernet
-
-            # Generate a valid Fernet key
-            key = Fernet.generate_key().decode()
-
-            with patch("src.core.config.settings") as mock_settings:
-                mock_settings.ENCRYPTION_KEY = key
+        patched_settings.ENCRYPTION_KEY = encryption_key
 
-                service = SlackService()
-                original = "secret-token-12345"
+        service = SlackService()
+        original = "secret-token-12345"
 
-                encrypted = service._encrypt(original)
-                assert encrypted != original
+        encrypted = service._encrypt(original)
+        assert encrypted != original
 
-                decrypted = service._decrypt(encrypted)
-                assert decrypted == original
+        decrypted = service._decrypt(encrypted)
+        assert decrypted == original
 
-    def test_encrypt_without_key(self):
+    def test_encrypt_without_key(self, patched_settings):
         """Test encryption returns original when no key configured."""
-        with patch("src.core.config.settings") as mock_settings:
-            mock_settings.ENCRYPTION_KEY = None
+        patched_settings.ENCRYPTION_KEY = None
 
-            service = SlackService()
-            original = "secret-token-12345"
+        service = SlackService()
+        original = "secret-token-12345"
 
-            encrypted = service._encrypt(original)
-            assert encrypted == original
+        encrypted = service._encrypt(original)
+        assert encrypted == original
 
 
 class TestSlackServiceSendNotification:
@@ -137,7 +156,7 @@ class TestSlackServiceSendNotification:
     @pytest.mark.asyncio
     async def test_send_notification_not_connected(self, mock_db, sample_user_id, sample_email_payload):
         """Test sending notification when not connected raises error."""
-        mock_db.query.return_value.filter.return_value.first.return_value = None
+        set_db_first(mock_db, None)
 
         service = SlackService(db=mock_db)
 
@@ -151,17 +170,18 @@ class TestSlackServiceSendNotification:
         mock_slack_client,
         sample_user_id,
         sample_email_payload,
+        make_installation,
     ):
         """Test successful notification sending."""
-        # Setup mock installation
-        mock_installation = MagicMock(spec=SlackInstallation)
-        mock_installation.is_connected = True
-        mock_installation.is_active = True
-        mock_installation.bot_access_token = "encrypted-token"
-        mock_installation.dm_channel_id = "D12345"
-        mock_installation.user_slack_id = "U12345"
-
-        mock_db.query.return_value.filter.return_value.first.return_value = mock_installation
+        mock_installation = make_installation(
+            is_connected=True,
+            is_active=True,
+            bot_access_token="encrypted-token",
+            dm_channel_id="D12345",
+            user_slack_id="U12345",
+        )
+
+        set_db_first(mock_db, mock_installation)
 
         # Mock Slack client response
         mock_slack_client.chat_postMessage.return_value = {"ts": "1234567890.123456"}
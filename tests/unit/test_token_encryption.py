@@ -14,40 +14,31 @@ from src.services.token_encryption import (
 class TestTokenEncryptionService:
     """Tests for TokenEncryptionService."""
 
-    def test_encrypt_decrypt_roundtrip(self, encryption_key: str):
+    def test_encrypt_decrypt_roundtrip(self, encryption_service: TokenEncryptionService):
         """Test that encrypt followed by decrypt returns original value."""
-        service = TokenEncryptionService(encryption_key)
         original = "my-secret-oauth-token-12345"
 
-        encrypted = service.encrypt(original)
-        decrypted = service.decrypt(encrypted)
+        encrypted = encryption_service.encrypt(original)
+        decrypted = encryption_service.decrypt(encrypted)
 
         assert decrypted == original
 
-    def test_encrypt_produces_different_output(self, encryption_key: str):
+    def test_encrypt_produces_different_output(self, encryption_service: TokenEncryptionService):
         """Test that encrypting the same value twice produces different ciphertexts."""
-        service = TokenEncryptionService(encryption_key)
         plaintext = "my-secret-token"
 
-        encrypted1 = service.encrypt(plaintext)
-        encrypted2 = service.encrypt(plaintext)
+        encrypted1 = encryption_service.encrypt(plaintext)
+        encrypted2 = encryption_service.encrypt(plaintext)
 
         # Due to Fernet's use of IV, same plaintext produces different ciphertext
         assert encrypted1 != encrypted2
+        assert encrypted1 != plaintext
 
         # But both should decrypt to the same value
-        assert service.decrypt(encrypted1) == plaintext
-        assert service.decrypt(encrypted2) == plaintext
-
-    def test_encrypted_value_is_different_from_original(self, encryption_key: str):
-        """Test that encrypted value is not the same as the original."""
-        service = TokenEncryptionService(encryption_key)
-        original = "my-secret-token"
-
-        encrypted = service.encrypt(original)
-
-        assert encrypted != original
+        assert encryption_service.decrypt(encrypted1) == plaintext
+        assert encryption_service.decrypt(encrypted2) == plaintext
 
+    @pytest.mark.slow
     def test_decrypt_with_wrong_key_fails(self, encryption_key: str):
         """Test that decryption with wrong key raises error."""
         service1 = TokenEncryptionService(encryption_key)
@@ -61,30 +52,23 @@ class TestTokenEncryptionService:
 
         assert "invalid token or wrong key" in str(exc_info.value).lower()
 
-    def test_encrypt_empty_string_fails(self, encryption_key: str):
-        """Test that encrypting empty string raises error."""
-        service = TokenEncryptionService(encryption_key)
-
-        with pytest.raises(TokenEncryptionError) as exc_info:
-            service.encrypt("")
-
-        assert "empty" in str(exc_info.value).lower()
-
-    def test_decrypt_empty_string_fails(self, encryption_key: str):
-        """Test that decrypting empty string raises error."""
-        service = TokenEncryptionService(encryption_key)
-
+    @pytest.mark.parametrize(
+        "method,arg,msg",
+        [
+            pytest.param("encrypt", "", "empty", id="encrypt-empty"),
+            pytest.param("decrypt", "", "empty", id="decrypt-empty"),
+            pytest.param("decrypt", "not-a-valid-ciphertext", None, id="decrypt-invalid"),
+        ],
+    )
+    def test_invalid_input_fails(
+        self, encryption_service: TokenEncryptionService, method: str, arg: str, msg
+    ):
+        """Test that empty or malformed input raises error."""
         with pytest.raises(TokenEncryptionError) as exc_info:
-            service.decrypt("")
-
-        assert "empty" in str(exc_info.value).lower()
-
-    def test_decrypt_invalid_ciphertext_fails(self, encryption_key: str):
-        """Test that decrypting invalid ciphertext raises error."""
-        service = TokenEncryptionService(encryption_key)
+            getattr(encryption_service, method)(arg)
 
-        with pytest.raises(TokenEncryptionError):
-            service.decrypt("not-a-valid-ciphertext")
+        if msg:
+            assert msg in str(exc_info.value).lower()
 
     def test_invalid_encryption_key_fails(self):
         """Test that invalid encryption key raises error."""
@@ -93,23 +77,22 @@ class TestTokenEncryptionService:
 
         assert "invalid encryption key" in str(exc_info.value).lower()
 
-    def test_handles_unicode_content(self, encryption_key: str):
+    def test_handles_unicode_content(self, encryption_service: TokenEncryptionService):
         """Test encryption/decryption with unicode content."""
-        service = TokenEncryptionService(encryption_key)
         original = "token-with-unicode-XXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXX"
 
-        encrypted = service.encrypt(original)
-        decrypted = service.decrypt(encrypted)
+        encrypted = encryption_service.encrypt(original)
+        decrypted = encryption_service.decrypt(encrypted)
 
         assert decrypted == original
 
-    def test_handles_long_tokens(self, encryption_key: str):
+    @pytest.mark.slow
+    def test_handles_long_tokens(self, encryption_service: TokenEncryptionService):
         """Test encryption/decryption with long tokens."""
-        service = TokenEncryptionService(encryption_key)
         # OAuth tokens can be quite long
         original = "a" * 2000
 
-        encrypted = service.encrypt(original)
-        decrypted = service.decrypt(encrypted)
+        encrypted = encryption_service.encrypt(original)
+        decrypted = encryption_service.decrypt(encrypted)
 
         assert decrypted == original
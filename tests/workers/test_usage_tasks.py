@@ -1,10 +1,10 @@
 """Unit tests for usage tracking Celery tasks."""
 
 from datetime import datetime, timedelta
-from unittest.mock import MagicMock, patch
-from uuid import uuid4
+from unittest.mock import patch
 
 import pytest
+from sqlalchemy import insert, select
 from stripe.error import StripeError
 
 from src.models.billing import Plan, Subscription
@@ -17,45 +17,59 @@ from src.workers.tasks.usage_tasks import (
     _get_limit_for_agent,
 )
 
-
+NOW = datetime(2024, 1, 1, 0, 0, 0)
+PERIOD_END = NOW + timedelta(days=30)
+# Event timestamps one minute apart, built once at import
+_TS_CACHE = [NOW + timedelta(minutes=i) for i in range(256)]
+
+
+@pytest.fixture(scope="module")
+def plan_id(db_session_module):
+    """Create the Professional plan once per module and return its ID."""
+    plan = Plan(
+        id="price_test_123",
+        stripe_product_id="prod_test_123",
+        name="Professional",
+        price_cents=4900,
+        agents_included=["inbox", "invoice", "meeting"],
+        limits={
+            "emails_per_month": 1000,
+            "invoices_per_month": 100,
+            "meetings_per_month": 50,
+        },
+    )
+    plan_id = plan.id
+    db_session_module.add(plan)
+    db_session_module.commit()
+    return plan_id
+
+
+@pytest.fixture
+def task_session(monkeypatch, db_session_nested):
+    """Hand the test session to tasks that open their own via SessionLocal."""
+    monkeypatch.setattr("src.workers.tasks.usage_tasks.SessionLocal", lambda: db_session_nested)
+    return db_session_nested
+
+
+@pytest.mark.usefixtures("task_session")
 class TestResetUsageCountersTask:
     """Tests for reset_usage_counters Celery task."""
 
-    @pytest.fixture
-    def plan(self, db_session):
-        """Create test plan."""
-        plan = Plan(
-            name="Professional",
-            stripe_price_id="price_test_123",
-            price_cents=4900,
-            limits={
-                "emails_per_month": 1000,
-                "invoices_per_month": 100,
-                "meetings_per_month": 50,
-            },
-        )
-        db_session.add(plan)
-        db_session.commit()
-        return plan
-
-    @patch("src.workers.tasks.usage_tasks.SessionLocal")
-    def test_creates_new_counters_for_new_period(self, mock_session_local, db_session, plan):
+    def test_creates_new_counters_for_new_period(self, db_session_nested, plan_id, make_uuid):
         """Test that new counters are created when billing period rolls over."""
-        mock_session_local.return_value = db_session
-
         # Create subscription with new billing period
-        tenant_id = uuid4()
-        now = datetime.utcnow()
+        tenant_id = make_uuid()
         subscription = Subscription(
             tenant_id=tenant_id,
-            plan_id=plan.id,
+            plan_id=plan_id,
             stripe_subscription_id="sub_test",
+            stripe_customer_id="cus_test",
             status="active",
-            current_period_start=now,
-            current_period_end=now + timedelta(days=30),
+            current_period_start=NOW,
+            current_period_end=PERIOD_END,
         )
-        db_session.add(subscription)
-        db_session.commit()
+        db_session_nested.add(subscription)
+        db_session_nested.commit()
 
         # Run task
         result = reset_usage_counters()
@@ -65,32 +79,29 @@ class TestResetUsageCountersTask:
         assert result["subscriptions_checked"] == 1
 
         # Verify counters exist
-        counters = db_session.query(UsageCounter).filter(
-            UsageCounter.tenant_id == tenant_id
-        ).all()
+        counters = db_session_nested.query(
+            UsageCounter.agent, UsageCounter.count, UsageCounter.period_start
+        ).filter(UsageCounter.tenant_id == tenant_id).all()
         assert len(counters) == 3
-        assert {c.agent for c in counters} == {"inbox", "invoice", "meeting"}
-        for counter in counters:
-            assert counter.count == 0
-            assert counter.period_start == subscription.current_period_start
+        assert {agent for agent, _, _ in counters} == {"inbox", "invoice", "meeting"}
+        for _, count, period_start in counters:
+            assert count == 0
+            assert period_start == NOW
 
-    @patch("src.workers.tasks.usage_tasks.SessionLocal")
-    def test_skips_existing_counters(self, mock_session_local, db_session, plan):
+    def test_skips_existing_counters(self, db_session_nested, plan_id, make_uuid):
         """Test that existing counters are not recreated."""
-        mock_session_local.return_value = db_session
-
         # Create subscription
-        tenant_id = uuid4()
-        now = datetime.utcnow()
+        tenant_id = make_uuid()
         subscription = Subscription(
             tenant_id=tenant_id,
-            plan_id=plan.id,
+            plan_id=plan_id,
             stripe_subscription_id="sub_test",
+            stripe_customer_id="cus_test",
             status="active",
-            current_period_start=now,
-            current_period_end=now + timedelta(days=30),
+            current_period_start=NOW,
+            current_period_end=PERIOD_END,
         )
-        db_session.add(subscription)
+        db_session_nested.add(subscription)
 
         # Create existing counter
         existing_counter = UsageCounter(
@@ -100,8 +111,8 @@ class TestResetUsageCountersTask:
             period_end=subscription.current_period_end,
             count=100,
         )
-        db_session.add(existing_counter)
-        db_session.commit()
+        db_session_nested.add(existing_counter)
+        db_session_nested.commit()
 
         # Run task
         result = reset_usage_counters()
@@ -110,30 +121,30 @@ class TestResetUsageCountersTask:
         assert result["counters_created"] == 2
 
         # Verify existing counter was not modified
-        counter = db_session.query(UsageCounter).filter(
+        count = db_session_nested.query(UsageCounter.count).filter(
             UsageCounter.tenant_id == tenant_id,
             UsageCounter.agent == "inbox",
-        ).first()
-        assert counter.count == 100  # Not reset
+        ).scalar()
+        assert count == 100  # Not reset
 
-    @patch("src.workers.tasks.usage_tasks.SessionLocal")
-    def test_processes_multiple_subscriptions(self, mock_session_local, db_session, plan):
+    def test_processes_multiple_subscriptions(self, db_session_nested, plan_id, make_uuid):
         """Test that task processes all active subscriptions."""
-        mock_session_local.return_value = db_session
-
         # Create 3 subscriptions
-        now = datetime.utcnow()
-        for i in range(3):
-            subscription = Subscription(
-                tenant_id=uuid4(),
-                plan_id=plan.id,
-                stripe_subscription_id=f"sub_{i}",
-                status="active",
-                current_period_start=now,
-                current_period_end=now + timedelta(days=30),
-            )
-            db_session.add(subscription)
-        db_session.commit()
+        db_session_nested.add_all(
+            [
+                Subscription(
+                    tenant_id=make_uuid(),
+                    plan_id=plan_id,
+                    stripe_subscription_id=f"sub_{i}",
+                    stripe_customer_id="cus_test",
+                    status="active",
+                    current_period_start=NOW,
+                    current_period_end=PERIOD_END,
+                )
+                for i in range(3)
+            ]
+        )
+        db_session_nested.commit()
 
         # Run task
         result = reset_usage_counters()
@@ -142,24 +153,24 @@ class TestResetUsageCountersTask:
         assert result["subscriptions_checked"] == 3
         assert result["counters_created"] == 9  # 3 subscriptions * 3 agents
 
-    @patch("src.workers.tasks.usage_tasks.SessionLocal")
-    def test_only_processes_active_subscriptions(self, mock_session_local, db_session, plan):
+    def test_only_processes_active_subscriptions(self, db_session_nested, plan_id, make_uuid):
         """Test that only active/trial subscriptions are processed."""
-        mock_session_local.return_value = db_session
-
         # Create subscriptions with different statuses
-        now = datetime.utcnow()
-        for status in ["active", "trial", "canceled", "expired"]:
-            subscription = Subscription(
-                tenant_id=uuid4(),
-                plan_id=plan.id,
-                stripe_subscription_id=f"sub_{status}",
-                status=status,
-                current_period_start=now,
-                current_period_end=now + timedelta(days=30),
-            )
-            db_session.add(subscription)
-        db_session.commit()
+        db_session_nested.add_all(
+            [
+                Subscription(
+                    tenant_id=make_uuid(),
+                    plan_id=plan_id,
+                    stripe_subscription_id=f"sub_{status}",
+                    stripe_customer_id="cus_test",
+                    status=status,
+                    current_period_start=NOW,
+                    current_period_end=PERIOD_END,
+                )
+                for status in ["active", "trial", "canceled", "expired"]
+            ]
+        )
+        db_session_nested.commit()
 
         # Run task
         result = reset_usage_counters()
@@ -168,45 +179,27 @@ class TestResetUsageCountersTask:
         assert result["subscriptions_checked"] == 2  # active + trial
 
 
+@pytest.mark.usefixtures("task_session")
 class TestReportOverageToStripeTask:
     """Tests for report_overage_to_stripe Celery task."""
 
-    @pytest.fixture
-    def plan(self, db_session):
-        """Create test plan."""
-        plan = Plan(
-            name="Professional",
-            stripe_price_id="price_test_123",
-            price_cents=4900,
-            limits={
-                "emails_per_month": 1000,
-                "invoices_per_month": 100,
-                "meetings_per_month": 50,
-            },
-        )
-        db_session.add(plan)
-        db_session.commit()
-        return plan
-
     @patch("src.workers.tasks.usage_tasks.stripe_usage_reporter")
-    @patch("src.workers.tasks.usage_tasks.SessionLocal")
-    def test_reports_overage_to_stripe(self, mock_session_local, mock_reporter, db_session, plan):
+    def test_reports_overage_to_stripe(self, mock_reporter, db_session_nested, plan_id, make_uuid):
         """Test that overage is reported to Stripe."""
-        mock_session_local.return_value = db_session
         mock_reporter.report_usage.return_value = True
 
         # Create subscription
-        tenant_id = uuid4()
-        now = datetime.utcnow()
+        tenant_id = make_uuid()
         subscription = Subscription(
             tenant_id=tenant_id,
-            plan_id=plan.id,
+            plan_id=plan_id,
             stripe_subscription_id="sub_test",
+            stripe_customer_id="cus_test",
             status="active",
-            current_period_start=now,
-            current_period_end=now + timedelta(days=30),
+            current_period_start=NOW,
+            current_period_end=PERIOD_END,
         )
-        db_session.add(subscription)
+        db_session_nested.add(subscription)
 
         # Create counter with overage
         counter = UsageCounter(
@@ -216,8 +209,8 @@ class TestReportOverageToStripeTask:
             period_end=subscription.current_period_end,
             count=1200,  # 200 over limit
         )
-        db_session.add(counter)
-        db_session.commit()
+        db_session_nested.add(counter)
+        db_session_nested.commit()
 
         # Run task
         result = report_overage_to_stripe()
@@ -234,23 +227,20 @@ class TestReportOverageToStripeTask:
         assert "idempotency_key" in call_args[1]
 
     @patch("src.workers.tasks.usage_tasks.stripe_usage_reporter")
-    @patch("src.workers.tasks.usage_tasks.SessionLocal")
-    def test_skips_counters_without_overage(self, mock_session_local, mock_reporter, db_session, plan):
+    def test_skips_counters_without_overage(self, mock_reporter, db_session_nested, plan_id, make_uuid):
         """Test that counters without overage are skipped."""
-        mock_session_local.return_value = db_session
-
         # Create subscription
-        tenant_id = uuid4()
-        now = datetime.utcnow()
+        tenant_id = make_uuid()
         subscription = Subscription(
             tenant_id=tenant_id,
-            plan_id=plan.id,
+            plan_id=plan_id,
             stripe_subscription_id="sub_test",
+            stripe_customer_id="cus_test",
             status="active",
-            current_period_start=now,
-            current_period_end=now + timedelta(days=30),
+            current_period_start=NOW,
+            current_period_end=PERIOD_END,
         )
-        db_session.add(subscription)
+        db_session_nested.add(subscription)
 
         # Create counter without overage
         counter = UsageCounter(
@@ -260,8 +250,8 @@ class TestReportOverageToStripeTask:
             period_end=subscription.current_period_end,
             count=500,  # Under limit
         )
-        db_session.add(counter)
-        db_session.commit()
+        db_session_nested.add(counter)
+        db_session_nested.commit()
 
         # Run task
         result = report_overage_to_stripe()
@@ -271,11 +261,8 @@ class TestReportOverageToStripeTask:
         mock_reporter.report_usage.assert_not_called()
 
     @patch("src.workers.tasks.usage_tasks.stripe_usage_reporter")
-    @patch("src.workers.tasks.usage_tasks.SessionLocal")
-    def test_continues_after_individual_failure(self, mock_session_local, mock_reporter, db_session, plan):
+    def test_continues_after_individual_failure(self, mock_reporter, db_session_nested, plan_id, make_uuid):
         """Test that task continues processing after individual Stripe failure."""
-        mock_session_local.return_value = db_session
-
         # Mock Stripe to fail once then succeed
         mock_reporter.report_usage.side_effect = [
             StripeError("API Error"),
@@ -283,28 +270,32 @@ class TestReportOverageToStripeTask:
         ]
 
         # Create 2 subscriptions with overage
-        now = datetime.utcnow()
-        for i in range(2):
-            tenant_id = uuid4()
-            subscription = Subscription(
-                tenant_id=tenant_id,
-                plan_id=plan.id,
-                stripe_subscription_id=f"sub_{i}",
-                status="active",
-                current_period_start=now,
-                current_period_end=now + timedelta(days=30),
-            )
-            db_session.add(subscription)
-
-            counter = UsageCounter(
-                tenant_id=tenant_id,
-                agent="inbox",
-                period_start=subscription.current_period_start,
-                period_end=subscription.current_period_end,
-                count=1200,  # Overage
-            )
-            db_session.add(counter)
-        db_session.commit()
+        tenant_ids = [make_uuid() for _ in range(2)]
+        db_session_nested.add_all(
+            [
+                Subscription(
+                    tenant_id=tenant_id,
+                    plan_id=plan_id,
+                    stripe_subscription_id=f"sub_{i}",
+                    stripe_customer_id="cus_test",
+                    status="active",
+                    current_period_start=NOW,
+                    current_period_end=PERIOD_END,
+                )
+                for i, tenant_id in enumerate(tenant_ids)
+            ]
+            + [
+                UsageCounter(
+                    tenant_id=tenant_id,
+                    agent="inbox",
+                    period_start=NOW,
+                    period_end=PERIOD_END,
+                    count=1200,  # Overage
+                )
+                for tenant_id in tenant_ids
+            ]
+        )
+        db_session_nested.commit()
 
         # Run task
         result = report_overage_to_stripe()
@@ -315,26 +306,23 @@ class TestReportOverageToStripeTask:
         assert mock_reporter.report_usage.call_count == 2
 
     @patch("src.workers.tasks.usage_tasks.stripe_usage_reporter")
-    @patch("src.workers.tasks.usage_tasks.SessionLocal")
-    def test_aborts_when_circuit_breaker_opens(self, mock_session_local, mock_reporter, db_session, plan):
+    def test_aborts_when_circuit_breaker_opens(self, mock_reporter, db_session_nested, plan_id, make_uuid):
         """Test that task aborts when circuit breaker opens."""
-        mock_session_local.return_value = db_session
-
         # Mock circuit breaker to open
         mock_reporter.report_usage.side_effect = CircuitBreakerError("Circuit open")
 
         # Create subscription with overage
-        tenant_id = uuid4()
-        now = datetime.utcnow()
+        tenant_id = make_uuid()
         subscription = Subscription(
             tenant_id=tenant_id,
-            plan_id=plan.id,
+            plan_id=plan_id,
             stripe_subscription_id="sub_test",
+            stripe_customer_id="cus_test",
             status="active",
-            current_period_start=now,
-            current_period_end=now + timedelta(days=30),
+            current_period_start=NOW,
+            current_period_end=PERIOD_END,
         )
-        db_session.add(subscription)
+        db_session_nested.add(subscription)
 
         counter = UsageCounter(
             tenant_id=tenant_id,
@@ -343,8 +331,8 @@ class TestReportOverageToStripeTask:
             period_end=subscription.current_period_end,
             count=1200,
         )
-        db_session.add(counter)
-        db_session.commit()
+        db_session_nested.add(counter)
+        db_session_nested.commit()
 
         # Run task
         result = report_overage_to_stripe()
@@ -354,43 +342,37 @@ class TestReportOverageToStripeTask:
         assert mock_reporter.report_usage.call_count == 1
 
 
+@pytest.mark.usefixtures("task_session")
 class TestReconcileUsageCountersTask:
     """Tests for reconcile_usage_counters Celery task."""
 
-    @pytest.fixture
-    def plan(self, db_session):
-        """Create test plan."""
-        plan = Plan(
-            name="Professional",
-            stripe_price_id="price_test_123",
-            price_cents=4900,
-            limits={
-                "emails_per_month": 1000,
-                "invoices_per_month": 100,
-                "meetings_per_month": 50,
-            },
+    @pytest.fixture(scope="class")
+    def event_dicts(self):
+        """Tenant-agnostic usage event rows, built once for the class."""
+        return tuple(
+            {
+                "action_type": "email_processed",
+                "quantity": 1,
+                "idempotency_key": f"key_{i}",
+                "created_at": _TS_CACHE[i],
+            }
+            for i in range(200)
         )
-        db_session.add(plan)
-        db_session.commit()
-        return plan
 
-    @patch("src.workers.tasks.usage_tasks.SessionLocal")
-    def test_auto_corrects_drift_below_5_percent(self, mock_session_local, db_session, plan):
+    def test_auto_corrects_drift_below_5_percent(self, db_session_nested, plan_id, event_dicts, make_uuid):
         """Test that drift < 5% is auto-corrected."""
-        mock_session_local.return_value = db_session
-
         # Create subscription
-        tenant_id = uuid4()
-        now = datetime.utcnow()
+        tenant_id = make_uuid()
         subscription = Subscription(
             tenant_id=tenant_id,
-            plan_id=plan.id,
+            plan_id=plan_id,
             stripe_subscription_id="sub_test",
+            stripe_customer_id="cus_test",
             status="active",
-            current_period_start=now,
-            current_period_end=now + timedelta(days=30),
+            current_period_start=NOW,
+            current_period_end=PERIOD_END,
         )
-        db_session.add(subscription)
+        db_session_nested.add(subscription)
 
         # Create counter with incorrect count
         counter = UsageCounter(
@@ -400,20 +382,17 @@ class TestReconcileUsageCountersTask:
             period_end=subscription.current_period_end,
             count=100,  # Incorrect count
         )
-        db_session.add(counter)
+        db_session_nested.add(counter)
 
         # Create events that sum to 103 (3% drift)
-        for i in range(103):
-            event = UsageEvent(
-                tenant_id=tenant_id,
-                agent="inbox",
-                action_type="email_processed",
-                quantity=1,
-                idempotency_key=f"key_{i}",
-                created_at=now + timedelta(minutes=i),
-            )
-            db_session.add(event)
-        db_session.commit()
+        db_session_nested.execute(
+            insert(UsageEvent),
+            [
+                {**event, "tenant_id": tenant_id, "agent": "inbox"}
+                for event in event_dicts[:103]
+            ],
+        )
+        db_session_nested.commit()
 
         # Run task
         result = reconcile_usage_counters()
@@ -424,26 +403,25 @@ class TestReconcileUsageCountersTask:
         assert result["high_drift_alerts"] == 0
 
         # Verify counter was corrected
-        db_session.refresh(counter)
-        assert counter.count == 103
+        count = db_session_nested.scalar(
+            select(UsageCounter.count).where(UsageCounter.tenant_id == tenant_id)
+        )
+        assert count == 103
 
-    @patch("src.workers.tasks.usage_tasks.SessionLocal")
-    def test_alerts_on_drift_above_5_percent(self, mock_session_local, db_session, plan):
+    def test_alerts_on_drift_above_5_percent(self, db_session_nested, plan_id, event_dicts, make_uuid):
         """Test that drift >= 5% triggers alert without auto-correction."""
-        mock_session_local.return_value = db_session
-
         # Create subscription
-        tenant_id = uuid4()
-        now = datetime.utcnow()
+        tenant_id = make_uuid()
         subscription = Subscription(
             tenant_id=tenant_id,
-            plan_id=plan.id,
+            plan_id=plan_id,
             stripe_subscription_id="sub_test",
+            stripe_customer_id="cus_test",
             status="active",
-            current_period_start=now,
-            current_period_end=now + timedelta(days=30),
+            current_period_start=NOW,
+            current_period_end=PERIOD_END,
         )
-        db_session.add(subscription)
+        db_session_nested.add(subscription)
 
         # Create counter with incorrect count
         counter = UsageCounter(
@@ -453,20 +431,17 @@ class TestReconcileUsageCountersTask:
             period_end=subscription.current_period_end,
             count=100,  # Incorrect count
         )
-        db_session.add(counter)
+        db_session_nested.add(counter)
 
         # Create events that sum to 110 (10% drift)
-        for i in range(110):
-            event = UsageEvent(
-                tenant_id=tenant_id,
-                agent="inbox",
-                action_type="email_processed",
-                quantity=1,
-                idempotency_key=f"key_{i}",
-                created_at=now + timedelta(minutes=i),
-            )
-            db_session.add(event)
-        db_session.commit()
+        db_session_nested.execute(
+            insert(UsageEvent),
+            [
+                {**event, "tenant_id": tenant_id, "agent": "inbox"}
+                for event in event_dicts[:110]
+            ],
+        )
+        db_session_nested.commit()
 
         # Run task
         result = reconcile_usage_counters()
@@ -477,26 +452,25 @@ class TestReconcileUsageCountersTask:
         assert result["high_drift_alerts"] == 1  # Alert generated
 
         # Verify counter was NOT modified
-        db_session.refresh(counter)
-        assert counter.count == 100  # Still incorrect
+        count = db_session_nested.scalar(
+            select(UsageCounter.count).where(UsageCounter.tenant_id == tenant_id)
+        )
+        assert count == 100  # Still incorrect
 
-    @patch("src.workers.tasks.usage_tasks.SessionLocal")
-    def test_handles_no_drift(self, mock_session_local, db_session, plan):
+    def test_handles_no_drift(self, db_session_nested, plan_id, event_dicts, make_uuid):
         """Test that correct counters are left unchanged."""
-        mock_session_local.return_value = db_session
-
         # Create subscription
-        tenant_id = uuid4()
-        now = datetime.utcnow()
+        tenant_id = make_uuid()
         subscription = Subscription(
             tenant_id=tenant_id,
-            plan_id=plan.id,
+            plan_id=plan_id,
             stripe_subscription_id="sub_test",
+            stripe_customer_id="cus_test",
             status="active",
-            current_period_start=now,
-            current_period_end=now + timedelta(days=30),
+            current_period_start=NOW,
+            current_period_end=PERIOD_END,
         )
-        db_session.add(subscription)
+        db_session_nested.add(subscription)
 
         # Create counter with correct count
         counter = UsageCounter(
@@ -506,20 +480,17 @@ class TestReconcileUsageCountersTask:
             period_end=subscription.current_period_end,
             count=100,
         )
-        db_session.add(counter)
+        db_session_nested.add(counter)
 
         # Create exactly 100 events
-        for i in range(100):
-            event = UsageEvent(
-                tenant_id=tenant_id,
-                agent="inbox",
-                action_type="email_processed",
-                quantity=1,
-                idempotency_key=f"key_{i}",
-                created_at=now + timedelta(minutes=i),
-            )
-            db_session.add(event)
-        db_session.commit()
+        db_session_nested.execute(
+            insert(UsageEvent),
+            [
+                {**event, "tenant_id": tenant_id, "agent": "inbox"}
+                for event in event_dicts[:100]
+            ],
+        )
+        db_session_nested.commit()
 
         # Run task
         result = reconcile_usage_counters()
@@ -529,23 +500,20 @@ class TestReconcileUsageCountersTask:
         assert result["auto_corrected"] == 0
         assert result["high_drift_alerts"] == 0
 
-    @patch("src.workers.tasks.usage_tasks.SessionLocal")
-    def test_handles_zero_events(self, mock_session_local, db_session, plan):
+    def test_handles_zero_events(self, db_session_nested, plan_id, make_uuid):
         """Test reconciliation when counter has count but no events."""
-        mock_session_local.return_value = db_session
-
         # Create subscription
-        tenant_id = uuid4()
-        now = datetime.utcnow()
+        tenant_id = make_uuid()
         subscription = Subscription(
             tenant_id=tenant_id,
-            plan_id=plan.id,
+            plan_id=plan_id,
             stripe_subscription_id="sub_test",
+            stripe_customer_id="cus_test",
             status="active",
-            current_period_start=now,
-            current_period_end=now + timedelta(days=30),
+            current_period_start=NOW,
+            current_period_end=PERIOD_END,
         )
-        db_session.add(subscription)
+        db_session_nested.add(subscription)
 
         # Create counter with count but no events
         counter = UsageCounter(
@@ -555,9 +523,9 @@ class TestReconcileUsageCountersTask:
             period_end=subscription.current_period_end,
             count=50,  # Has count
         )
-        db_session.add(counter)
+        db_session_nested.add(counter)
         # No events created
-        db_session.commit()
+        db_session_nested.commit()
 
         # Run task
         result = reconcile_usage_counters()
@@ -570,72 +538,46 @@ class TestReconcileUsageCountersTask:
 class TestGetLimitForAgentHelper:
     """Tests for _get_limit_for_agent helper function."""
 
-    def test_returns_correct_limit_for_inbox(self, db_session):
-        """Test that correct limit is returned for inbox agent."""
-        plan = Plan(
-            name="Test",
-            stripe_price_id="price_test",
-            price_cents=1000,
-            limits={"emails_per_month": 500},
-        )
-        db_session.add(plan)
-        db_session.commit()
-
-        limit = _get_limit_for_agent(plan, "inbox")
-        assert limit == 500
-
-    def test_returns_correct_limit_for_invoice(self, db_session):
-        """Test that correct limit is returned for invoice agent."""
-        plan = Plan(
-            name="Test",
-            stripe_price_id="price_test",
-            price_cents=1000,
-            limits={"invoices_per_month": 50},
-        )
-        db_session.add(plan)
-        db_session.commit()
-
-        limit = _get_limit_for_agent(plan, "invoice")
-        assert limit == 50
-
-    def test_returns_correct_limit_for_meeting(self, db_session):
-        """Test that correct limit is returned for meeting agent."""
+    @pytest.mark.parametrize(
+        "agent,limit_key,expected",
+        [
+            ("inbox", "emails_per_month", 500),
+            ("invoice", "invoices_per_month", 50),
+            ("meeting", "meetings_per_month", 25),
+        ],
+    )
+    def test_returns_correct_limit_for_agent(self, agent, limit_key, expected):
+        """Test that the agent's limit is read from its plan limit key."""
         plan = Plan(
+            id="price_test",
             name="Test",
-            stripe_price_id="price_test",
             price_cents=1000,
-            limits={"meetings_per_month": 25},
+            limits={limit_key: expected},
         )
-        db_session.add(plan)
-        db_session.commit()
 
-        limit = _get_limit_for_agent(plan, "meeting")
-        assert limit == 25
+        limit = _get_limit_for_agent(plan, agent)
+        assert limit == expected
 
-    def test_returns_zero_for_unknown_agent(self, db_session):
+    def test_returns_zero_for_unknown_agent(self):
         """Test that 0 is returned for unknown agent type."""
         plan = Plan(
+            id="price_test",
             name="Test",
-            stripe_price_id="price_test",
             price_cents=1000,
             limits={},
         )
-        db_session.add(plan)
-        db_session.commit()
 
         limit = _get_limit_for_agent(plan, "unknown_agent")
         assert limit == 0
 
-    def test_returns_zero_when_limit_missing(self, db_session):
+    def test_returns_zero_when_limit_missing(self):
         """Test that 0 is returned when limit key is missing."""
         plan = Plan(
+            id="price_test",
             name="Test",
-            stripe_price_id="price_test",
             price_cents=1000,
             limits={},  # No limits defined
         )
-        db_session.add(plan)
-        db_session.commit()
 
         limit = _get_limit_for_agent(plan, "inbox")
         assert limit == 0